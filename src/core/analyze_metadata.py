@@ -6,8 +6,14 @@ incluyendo PDF, DOCX e Imágenes (JPEG/PNG/HEIC).
 """
 from __future__ import annotations
 
+import mmap
+import multiprocessing
+import os
+import struct
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 import json
 
@@ -16,11 +22,16 @@ from PIL import Image
 from PIL.ExifTags import TAGS
 from PyPDF2 import PdfReader
 from docx import Document
+from docx.opc.coreprops import CoreProperties
+from docx.oxml import parse_xml
 import piexif
 import piexif.helper
 from pillow_heif import register_heif_opener
 
-from utils.path_tools import ensure_readable_file
+from utils.mime_tools import DOCX_MIMES, IMAGE_PREFIX, PDF_MIME
+from utils.path_tools import FileCtx, ensure_readable_file
+
+from .modify_metadata.utils_modifier import PDF_READ_BUFFER
 
 # Habilita el soporte HEIC para Pillow
 register_heif_opener()
@@ -28,44 +39,104 @@ register_heif_opener()
 
 
 
+def _decode_bytes(value: bytes) -> str:
+    """Decodifica bytes EXIF a texto (o a su representación si no es posible)."""
+    try:
+        return value.decode("utf-8", "ignore")
+    except Exception:
+        # Si no podemos decodificarlo, devolvemos la representación en cadena
+        return repr(value)
+
+
+# Tipos que se devuelven tal cual sin más comprobaciones
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+def _sanitize_tuple(value: tuple) -> tuple:
+    return tuple([sanitize_exif_value(v) for v in value])
+
+
+def _sanitize_list(value: list) -> list:
+    return [sanitize_exif_value(v) for v in value]
+
+
+def _sanitize_dict(value: dict) -> dict:
+    return {k: sanitize_exif_value(v) for k, v in value.items()}
+
+
+# Función de saneado para cada tipo (búsqueda O(1) por type(); sin cadenas de isinstance)
+_SANITIZE_HANDLERS = {
+    bytes: _decode_bytes,
+    bytearray: _decode_bytes,
+    tuple: _sanitize_tuple,
+    list: _sanitize_list,
+    dict: _sanitize_dict,
+}
+
+# Para subclases (ej. namedtuple) se recurre a isinstance, en el orden original
+_SANITIZE_FALLBACKS = (
+    ((bytes, bytearray), _decode_bytes),
+    (tuple, _sanitize_tuple),
+    (list, _sanitize_list),
+    (dict, _sanitize_dict),
+)
+
+
 def sanitize_exif_value(value: Any) -> Any:
     """
     Ayuda a convertir datos EXIF en formatos compatibles con JSON.
-    Maneja la decodificación de bytes y estructuras recursivas.
+    Maneja la decodificación de bytes y estructuras anidadas.
     """
-    if isinstance(value, bytes):
-        try:
-            return value.decode("utf-8", "ignore")
-        except Exception:
-            # Si no podemos decodificarlo, devolvemos la representación en cadena
-            return repr(value)
-            
-    if isinstance(value, tuple):
-        return tuple(sanitize_exif_value(v) for v in value)
+    value_type = type(value)
+    if value_type in _SCALAR_TYPES:
+        return value
         
-    if isinstance(value, list):
-        return [sanitize_exif_value(v) for v in value]
-        
-    if isinstance(value, dict):
-        return {k: sanitize_exif_value(v) for k, v in value.items()}
+    handler = _SANITIZE_HANDLERS.get(value_type)
+    if handler is not None:
+        return handler(value)
         
+    for base, handler in _SANITIZE_FALLBACKS:
+        if isinstance(value, base):
+            return handler(value)
     return value
 
 
-def extract_metadata_pdf(file_path: str | Path) -> Dict[str, Any]:
+def _pdf_info(pdf: PdfReader) -> Dict[str, Any]:
+    """Convierte el diccionario /Info en un diccionario de cadenas."""
+    info = pdf.metadata or {}
+    # Elimina / inicial
+    return {key.strip("/"): str(value) for key, value in info.items()}
+
+
+def _pdf_metadata_only(safe_path: Path, content: Optional[mmap.mmap] = None) -> Dict[str, Any]:
+    """
+    Lee únicamente el diccionario /Info del PDF.
+    No accede a ``pages``, así PyPDF2 solo resuelve el xref y el trailer.
+    Si se pasa *content* (el archivo ya mapeado) se lee de ahí sin volver a abrirlo.
+    """
+    if content is not None:
+        content.seek(0)
+        return _pdf_info(PdfReader(content, strict=False))
+        
+    with safe_path.open("rb", buffering=PDF_READ_BUFFER) as f:
+        return _pdf_info(PdfReader(f, strict=False))
+
+
+def _map_file(safe_path: Path) -> Optional[mmap.mmap]:
+    """Mapea el archivo en memoria de solo lectura (``None`` si no es posible)."""
+    try:
+        with safe_path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def extract_metadata_pdf(file_path: str | Path | FileCtx, content: Optional[mmap.mmap] = None) -> Dict[str, Any]:
     """Lee los metadatos de un archivo PDF."""
     metadata: Dict[str, Any] = {}
     safe_path = ensure_readable_file(file_path)
     
     try:
-        with safe_path.open("rb") as f:
-            pdf = PdfReader(f)
-            info = pdf.metadata or {}
-            
-            #Elimina / inicial
-            for key, value in info.items():
-                clean_key = key.strip("/")
-                metadata[clean_key] = str(value)
+        metadata = _pdf_metadata_only(safe_path, content)
                 
     except Exception as e:
         metadata["error"] = f"Failed to read PDF metadata: {e}"
@@ -73,14 +144,34 @@ def extract_metadata_pdf(file_path: str | Path) -> Dict[str, Any]:
     return metadata
 
 
-def extract_metadata_docx(file_path: str | Path) -> Dict[str, Any]:
+def _docx_core_properties(safe_path: Path) -> Optional[CoreProperties]:
+    """
+    Lee las propiedades principales directamente de ``docProps/core.xml``.
+    Evita que python-docx cargue y analice el cuerpo del documento (word/document.xml).
+    Devuelve ``None`` si el paquete no contiene esa parte.
+    """
+    with zipfile.ZipFile(str(safe_path)) as zf:
+        try:
+            raw = zf.read("docProps/core.xml")
+        except KeyError:
+            return None
+    return CoreProperties(parse_xml(raw))
+
+
+def extract_metadata_docx(file_path: str | Path | FileCtx) -> Dict[str, Any]:
     """Lee las propiedades principales de un archivo DOCX."""
     metadata: Dict[str, Any] = {}
     safe_path = ensure_readable_file(file_path)
     
     try:
-        doc = Document(str(safe_path))
-        props = doc.core_properties
+        props = None
+        try:
+            props = _docx_core_properties(safe_path)
+        except zipfile.BadZipFile:
+            pass
+        if props is None:
+            # Sin docProps/core.xml (o no es un ZIP): python-docx resuelve el paquete completo
+            props = Document(str(safe_path)).core_properties
         
         # Extrae propiedades estándar
         metadata = {
@@ -103,83 +194,339 @@ def generate_maps_link(lat: float, lon: float) -> str:
     return f"https://www.google.com/maps?q={lat},{lon}"
 
 
-def extract_metadata_image(file_path: str | Path) -> Dict[str, Any]:
+# Tipos MIME de la familia HEIF cuyo EXIF se lee recorriendo las cajas ISOBMFF
+_HEIF_EXIF_MIMES = frozenset({"image/heic", "image/heif"})
+
+
+def _iter_boxes(data: mmap.mmap, start: int, end: int) -> Iterable[tuple]:
+    """Recorre las cajas ISOBMFF entre *start* y *end* devolviendo (tipo, inicio_datos, fin)."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            # Tamaño extendido de 64 bits
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            # La caja llega hasta el final del contenedor
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _heif_exif_item_id(data: mmap.mmap, start: int, end: int) -> Optional[int]:
+    """Busca en la caja ``iinf`` el identificador del item de tipo Exif."""
+    # iinf es FullBox: versión/flags y número de entradas (16 o 32 bits)
+    pos = start + 4 + (2 if data[start] == 0 else 4)
+    for box_type, box_start, _ in _iter_boxes(data, pos, end):
+        if box_type != b"infe":
+            continue
+        version = data[box_start]
+        if version == 2:
+            item_id = struct.unpack_from(">H", data, box_start + 4)[0]
+            type_pos = box_start + 8
+        elif version == 3:
+            item_id = struct.unpack_from(">I", data, box_start + 4)[0]
+            type_pos = box_start + 10
+        else:
+            continue
+        if data[type_pos:type_pos + 4] == b"Exif":
+            return item_id
+    return None
+
+
+def _heif_item_extents(data: mmap.mmap, start: int, end: int, wanted_id: int) -> Optional[List[tuple]]:
+    """Devuelve los tramos (offset, longitud) del item *wanted_id* según la caja ``iloc``."""
+    version = data[start]
+    pos = start + 4
+    offset_size, length_size = data[pos] >> 4, data[pos] & 0x0F
+    base_offset_size = data[pos + 1] >> 4
+    index_size = data[pos + 1] & 0x0F if version in (1, 2) else 0
+    pos += 2
+    
+    id_format = ">H" if version < 2 else ">I"
+    id_size = struct.calcsize(id_format)
+    item_count = struct.unpack_from(id_format, data, pos)[0]
+    pos += id_size
+    
+    for _ in range(item_count):
+        item_id = struct.unpack_from(id_format, data, pos)[0]
+        pos += id_size
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = struct.unpack_from(">H", data, pos)[0] & 0x0F
+            pos += 2
+        # data_reference_index
+        pos += 2
+        base_offset = int.from_bytes(data[pos:pos + base_offset_size], "big")
+        pos += base_offset_size
+        extent_count = struct.unpack_from(">H", data, pos)[0]
+        pos += 2
+        
+        extents = []
+        for _ in range(extent_count):
+            pos += index_size
+            extent_offset = int.from_bytes(data[pos:pos + offset_size], "big")
+            pos += offset_size
+            extent_length = int.from_bytes(data[pos:pos + length_size], "big")
+            pos += length_size
+            extents.append((base_offset + extent_offset, extent_length))
+        if pos > end:
+            return None
+            
+        if item_id == wanted_id:
+            # Solo se leen items almacenados por offset de archivo (no en idat)
+            return extents if construction_method == 0 else None
+            
+    return None
+
+
+def _heic_exif_bytes(data: mmap.mmap) -> Optional[bytes]:
+    """
+    Extrae el bloque EXIF de un HEIC/HEIF recorriendo las cajas meta → iinf → iloc,
+    sin decodificar la rejilla de teselas. Devuelve ``None`` si no lo encuentra.
+    """
+    size = len(data)
+    meta = next(((s, e) for box_type, s, e in _iter_boxes(data, 0, size) if box_type == b"meta"), None)
+    if meta is None:
+        return None
+        
+    exif_id = None
+    iloc = None
+    # meta es FullBox: 4 bytes de versión y flags antes de las cajas hijas
+    for box_type, box_start, box_end in _iter_boxes(data, meta[0] + 4, meta[1]):
+        if box_type == b"iinf":
+            exif_id = _heif_exif_item_id(data, box_start, box_end)
+        elif box_type == b"iloc":
+            iloc = (box_start, box_end)
+    if exif_id is None or iloc is None:
+        return None
+        
+    extents = _heif_item_extents(data, iloc[0], iloc[1], exif_id)
+    if not extents:
+        return None
+        
+    chunks = []
+    for offset, length in extents:
+        # Longitud 0: el tramo llega hasta el final del archivo
+        stop = size if length == 0 else offset + length
+        if stop > size:
+            return None
+        chunks.append(data[offset:stop])
+    item = b"".join(chunks)
+    
+    # El item empieza con el desplazamiento (32 bits) hasta la cabecera TIFF
+    if len(item) < 4:
+        return None
+    tiff_offset = 4 + int.from_bytes(item[:4], "big")
+    # Mismo formato que Pillow expone en img.info["exif"]
+    return b"Exif\x00\x00" + item[tiff_offset:]
+
+
+def _fast_exif_bytes(safe_path: Path, mime_type: Optional[str]) -> Optional[bytes]:
+    """
+    Localiza el bloque EXIF sin abrir la imagen con Pillow.
+    Recorre los segmentos APPn de un JPEG, los chunks de un PNG o las cajas de un HEIC sobre un mmap,
+    de modo que solo se tocan las cabeceras. Devuelve ``None`` si no lo encuentra.
+    """
+    try:
+        with safe_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            
+            if mime_type == "image/jpeg":
+                if mm[:2] != b"\xff\xd8":
+                    return None
+                pos = 2
+                while pos + 4 <= size:
+                    if mm[pos] != 0xFF:
+                        return None
+                    marker = mm[pos + 1]
+                    # Bytes de relleno entre marcadores
+                    if marker == 0xFF:
+                        pos += 1
+                        continue
+                    # Marcadores sin longitud (TEM, RSTn)
+                    if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                        pos += 2
+                        continue
+                    # SOS / EOI: los metadatos siempre van antes de los datos de imagen
+                    if marker in (0xDA, 0xD9):
+                        return None
+                    length = int.from_bytes(mm[pos + 2:pos + 4], "big")
+                    if marker == 0xE1 and mm[pos + 4:pos + 10] == b"Exif\x00\x00":
+                        return mm[pos + 4:pos + 2 + length]
+                    pos += 2 + length
+                    
+            elif mime_type == "image/png":
+                if mm[:8] != b"\x89PNG\r\n\x1a\n":
+                    return None
+                pos = 8
+                while pos + 8 <= size:
+                    length = int.from_bytes(mm[pos:pos + 4], "big")
+                    chunk_type = mm[pos + 4:pos + 8]
+                    if chunk_type == b"eXIf":
+                        # Mismo formato que Pillow expone en img.info["exif"]
+                        return b"Exif\x00\x00" + mm[pos + 8:pos + 8 + length]
+                    if chunk_type in (b"IDAT", b"IEND"):
+                        return None
+                    # longitud + tipo + datos + CRC
+                    pos += 12 + length
+                    
+            elif mime_type in _HEIF_EXIF_MIMES:
+                return _heic_exif_bytes(mm)
+    except (OSError, ValueError, IndexError, struct.error):
+        pass
+        
+    return None
+
+
+# Nombres de etiqueta de piexif indexados por (IFD, id) para resolverlos con una sola búsqueda
+_PIEXIF_TAG_NAMES: Dict[tuple, str] = {
+    (ifd_name, tag_id): info["name"]
+    for ifd_name, tags in piexif.TAGS.items()
+    for tag_id, info in tags.items()
+}
+
+
+# Prefijo APP1 que precede a la cabecera TIFF y órdenes de bytes válidos de esa cabecera
+_EXIF_PREFIX = b"Exif\x00\x00"
+_TIFF_BYTE_ORDERS = (b"II", b"MM")
+
+
+def _tiff_exif_bytes(exif_bytes: Optional[bytes]) -> Optional[bytes]:
+    """
+    Quita los prefijos ``Exif\\x00\\x00`` (también repetidos) y comprueba que lo que queda
+    empiece por una cabecera TIFF. Devuelve ``None`` si piexif no podría leerlo.
+    """
+    if not exif_bytes:
+        return None
+    start = 0
+    while exif_bytes.startswith(_EXIF_PREFIX, start):
+        start += len(_EXIF_PREFIX)
+    if exif_bytes[start:start + 2] not in _TIFF_BYTE_ORDERS:
+        return None
+    return exif_bytes[start:]
+
+
+def _metadata_from_exif_bytes(exif_bytes: bytes, metadata: Dict[str, Any]) -> None:
+    """Vuelca en *metadata* las etiquetas de un bloque EXIF sin procesar."""
+    exif_data = piexif.load(exif_bytes)
+    
+    for ifd_name, content in exif_data.items():
+        if isinstance(content, dict):
+            for tag_id, value in content.items():
+                # Resuelve los nombres de las etiquetas
+                tag_name = _PIEXIF_TAG_NAMES.get((ifd_name, tag_id)) or f"{ifd_name}-{tag_id}"
+                
+                if ifd_name == "GPS":
+                    if "GPS" not in metadata:
+                        metadata["GPS"] = {}
+                    # Se asegura de que sea un diccionario antes de asignar
+                    if not isinstance(metadata["GPS"], dict):
+                        metadata["GPS"] = {}
+                    metadata["GPS"][tag_name] = sanitize_exif_value(value)
+                elif tag_name == "UserComment":
+                    # Intentar parsear UserComment como JSON para metadatos personalizados
+                    try:
+                        # UserComment suele venir como bytes con prefijo
+                        comment = piexif.helper.UserComment.load(value)
+                        if comment:
+                            custom_data = json.loads(comment)
+                            if isinstance(custom_data, dict):
+                                metadata.update(custom_data)
+                            else:
+                                metadata["UserComment"] = comment
+                    except Exception:
+                        # Si falla, guardar como string normal
+                        metadata[tag_name] = sanitize_exif_value(value)
+                else:
+                    # Evita colisión: El IFD 0 tiene una etiqueta llamada "GPS" (offset), que sobrescribiría nuestro diccionario GPS
+                    if tag_name == "GPS":
+                        tag_name = "GPSOffset"
+                    metadata[tag_name] = sanitize_exif_value(value)
+    
+    # Procesa las coordenadas GPS si están disponibles
+    coords = parse_gps_coordinates(exif_data.get("GPS", {}))
+    if coords:
+        metadata.update(coords)
+        if "GPS_Latitude" in coords and "GPS_Longitude" in coords:
+            metadata["MapsLink"] = generate_maps_link(coords["GPS_Latitude"], coords["GPS_Longitude"])
+
+
+# Claves de img.info que no se vuelcan (binarias o internas); incluye las variantes
+# de mayúsculas que usa Pillow para no tener que normalizar cada clave
+_IGNORED_INFO_KEYS = frozenset({
+    "exif",
+    "icc_profile",
+    "photoshop",
+    "xml:com.adobe.xmp",
+    "XML:com.adobe.xmp",
+})
+
+
+# Formatos con ruta rápida de lectura EXIF y el nombre que Pillow les daría
+_FAST_EXIF_FORMATS = {
+    "image/jpeg": "JPEG",
+    "image/png": "PNG",
+    "image/heic": "HEIF",
+    "image/heif": "HEIF",
+}
+
+
+def extract_metadata_image(file_path: str | Path | FileCtx, mime_type: Optional[str] = None) -> Dict[str, Any]:
     """
     Extrae EXIF y otros metadatos de imágenes.
     Soporta formatos estándar + HEIC.
+    Si se indica *mime_type* (JPEG/PNG) se intenta leer el EXIF directamente del archivo
+    y solo se recurre a Pillow cuando no se encuentra.
     """
     safe_path = ensure_readable_file(file_path)
+    if mime_type is None and isinstance(file_path, FileCtx):
+        mime_type = file_path.mime_type
     metadata: Dict[str, Any] = {}
     
     try:
-        img = Image.open(str(safe_path))
-        metadata["Format"] = img.format
+        fast_format = _FAST_EXIF_FORMATS.get(mime_type or "")
+        if fast_format:
+            exif_bytes = _tiff_exif_bytes(_fast_exif_bytes(safe_path, mime_type))
+            if exif_bytes:
+                metadata["Format"] = fast_format
+                _metadata_from_exif_bytes(exif_bytes, metadata)
+                return metadata
         
-        # Intenta obtener datos EXIF sin procesar primero
-        exif_bytes = img.info.get("exif")
+        # Solo se leen la cabecera, img.info y getexif(): los píxeles nunca se decodifican
+        with Image.open(str(safe_path)) as img:
+            metadata["Format"] = img.format
         
-        if exif_bytes:
-            exif_data = piexif.load(exif_bytes)
-            
-            for ifd_name, content in exif_data.items():
-                if isinstance(content, dict):
-                    for tag_id, value in content.items():
-                        # Resuelve los nombres de las etiquetas
-                        tag_name = piexif.TAGS.get(ifd_name, {}).get(tag_id, {}).get("name", f"{ifd_name}-{tag_id}")
-                        
-                        if ifd_name == "GPS":
-                            if "GPS" not in metadata:
-                                metadata["GPS"] = {}
-                            # Se asegura de que sea un diccionario antes de asignar
-                            if not isinstance(metadata["GPS"], dict):
-                                metadata["GPS"] = {}
-                            metadata["GPS"][tag_name] = sanitize_exif_value(value)
-                        elif tag_name == "UserComment":
-                            # Intentar parsear UserComment como JSON para metadatos personalizados
-                            try:
-                                # UserComment suele venir como bytes con prefijo
-                                comment = piexif.helper.UserComment.load(value)
-                                if comment:
-                                    custom_data = json.loads(comment)
-                                    if isinstance(custom_data, dict):
-                                        metadata.update(custom_data)
-                                    else:
-                                        metadata["UserComment"] = comment
-                            except Exception:
-                                # Si falla, guardar como string normal
-                                metadata[tag_name] = sanitize_exif_value(value)
-                        else:
-                            # Evita colisión: El IFD 0 tiene una etiqueta llamada "GPS" (offset), que sobrescribiría nuestro diccionario GPS
-                            if tag_name == "GPS":
-                                tag_name = "GPSOffset"
-                            metadata[tag_name] = sanitize_exif_value(value)
-            
-            # Procesa las coordenadas GPS si están disponibles
-            coords = parse_gps_coordinates(exif_data.get("GPS", {}))
-            if coords:
-                metadata.update(coords)
-                if "GPS_Latitude" in coords and "GPS_Longitude" in coords:
-                    metadata["MapsLink"] = generate_maps_link(coords["GPS_Latitude"], coords["GPS_Longitude"])
-            
-            return metadata
+            # Intenta obtener datos EXIF sin procesar primero; si la cabecera no es válida
+            # se pasa directamente a getexif() sin intentar piexif
+            exif_bytes = _tiff_exif_bytes(img.info.get("exif"))
+        
+            if exif_bytes:
+                _metadata_from_exif_bytes(exif_bytes, metadata)
+                return metadata
             
-        # Alternativa para EXIF básico
-        exif = img.getexif()
-        if exif:
-            for tag_id, value in exif.items():
-                tag_name = TAGS.get(tag_id, str(tag_id))
-                metadata[tag_name] = sanitize_exif_value(value)
+            # Alternativa para EXIF básico
+            exif = img.getexif()
+            if exif:
+                for tag_id, value in exif.items():
+                    tag_name = TAGS.get(tag_id, str(tag_id))
+                    metadata[tag_name] = sanitize_exif_value(value)
         
-        # Leer metadatos adicionales de img.info (ej. PNG text chunks)
-        # Filtramos claves binarias o internas grandes
-        ignored_keys = {"exif", "icc_profile", "photoshop", "xml:com.adobe.xmp"}
-        for key, value in img.info.items():
-            if key.lower() not in ignored_keys and isinstance(value, (str, int, float)):
-                metadata[key] = value
-
-        if not exif and not metadata.get("info") and len(metadata) <= 1:
-             # Si solo tenemos "Format" y nada más
-            metadata["info"] = "No EXIF data found in image."
+            # Leer metadatos adicionales de img.info (ej. PNG text chunks)
+            # Filtramos claves binarias o internas grandes
+            for key, value in img.info.items():
+                if key not in _IGNORED_INFO_KEYS and isinstance(value, (str, int, float)):
+                    metadata[key] = value
+
+            if not exif and not metadata.get("info") and len(metadata) <= 1:
+                 # Si solo tenemos "Format" y nada más
+                metadata["info"] = "No EXIF data found in image."
             
     except Exception as e:
         metadata["error"] = f"Error processing image: {e}"
@@ -187,6 +534,24 @@ def extract_metadata_image(file_path: str | Path) -> Dict[str, Any]:
     return metadata
 
 
+# Signo de cada referencia de hemisferio GPS (piexif devuelve bytes, Pillow cadenas)
+_HEMISPHERE_SIGN = {
+    b"N": 1.0, "N": 1.0,
+    b"S": -1.0, "S": -1.0,
+    b"E": 1.0, "E": 1.0,
+    b"W": -1.0, "W": -1.0,
+}
+
+
+def _dms_to_decimal(dms: Any) -> float:
+    """Convierte (grados, minutos, segundos) a grados decimales."""
+    # Valores ya numéricos (sin tuplas racionales)
+    if isinstance(dms[0], (int, float)):
+        return dms[0] + dms[1] / 60.0 + dms[2] / 3600.0
+    (deg_num, deg_den), (min_num, min_den), (sec_num, sec_den) = dms
+    return deg_num / deg_den + min_num / min_den / 60.0 + sec_num / sec_den / 3600.0
+
+
 def parse_gps_coordinates(gps_info: Dict[str, Any]) -> Dict[str, float]:
     """
     Decodifica metadatos GPS (tuplas racionales) a grados decimales.
@@ -194,25 +559,11 @@ def parse_gps_coordinates(gps_info: Dict[str, Any]) -> Dict[str, float]:
     if not gps_info:
         return {}
 
-    def dms_to_decimal(dms_tuple):
-        degrees = dms_tuple[0][0] / dms_tuple[0][1]
-        minutes = dms_tuple[1][0] / dms_tuple[1][1]
-        seconds = dms_tuple[2][0] / dms_tuple[2][1]
-        return degrees + (minutes / 60) + (seconds / 3600)
-
     try:
         # Etiquetas GPS: 1=LatRef, 2=Lat, 3=LonRef, 4=Lon
-        lat = dms_to_decimal(gps_info[2])
-        lon = dms_to_decimal(gps_info[4])
-        
-        # Ajuste por hemisferio
-        lat_ref = gps_info.get(1)
-        if lat_ref in {b"S", "S"}:
-            lat = -lat
-            
-        lon_ref = gps_info.get(3)
-        if lon_ref in {b"W", "W"}:
-            lon = -lon
+        # El hemisferio se aplica como signo multiplicativo
+        lat = _dms_to_decimal(gps_info[2]) * _HEMISPHERE_SIGN.get(gps_info.get(1), 1.0)
+        lon = _dms_to_decimal(gps_info[4]) * _HEMISPHERE_SIGN.get(gps_info.get(3), 1.0)
             
         return {"GPS_Latitude": lat, "GPS_Longitude": lon}
         
@@ -221,14 +572,17 @@ def parse_gps_coordinates(gps_info: Dict[str, Any]) -> Dict[str, float]:
         return {}
 
 
-def extract_metadata_auto(file_path: str | Path) -> Dict[str, Any]:
+def extract_metadata_auto(file_path: str | Path, mime_type: Optional[str] = None) -> Dict[str, Any]:
     """
     Punto de entrada principal: detecta el tipo de archivo y llama al extractor apropiado.
+    Si el llamador ya conoce el tipo MIME puede pasarlo en *mime_type* para evitar detectarlo de nuevo.
     """
-    safe_path = ensure_readable_file(file_path)
+    # Valida la ruta y hace stat() una sola vez para todo el análisis
+    ctx = FileCtx.from_path(file_path, mime_type)
+    safe_path = ctx.path
 
     # Comprobación rápida de archivos vacíos
-    if safe_path.stat().st_size == 0:
+    if ctx.stat_result.st_size == 0:
         return {
             "file": safe_path.name,
             "path": str(safe_path),
@@ -238,10 +592,12 @@ def extract_metadata_auto(file_path: str | Path) -> Dict[str, Any]:
         }
 
     # Detectar tipo
-    from .detect_extension import get_mime_type
-    mime_type = get_mime_type(safe_path)
+    if mime_type is None:
+        from .detect_extension import get_mime_type
+        mime_type = get_mime_type(ctx)
     if mime_type is None:
         mime_type = "application/octet-stream"
+    ctx.mime_type = mime_type
     extension = safe_path.suffix.lower()
 
     result = {
@@ -252,18 +608,18 @@ def extract_metadata_auto(file_path: str | Path) -> Dict[str, Any]:
         "metadata": {},
     }
 
+    # Los PDF se mapean una sola vez y el mapa se comparte con el escaneo de seguridad
+    content = _map_file(safe_path) if mime_type == PDF_MIME else None
+
     try:
-        if mime_type.startswith("image/"):
-            result["metadata"] = extract_metadata_image(safe_path)
+        if mime_type.startswith(IMAGE_PREFIX):
+            result["metadata"] = extract_metadata_image(ctx)
             
-        elif mime_type == "application/pdf":
-            result["metadata"] = extract_metadata_pdf(safe_path)
+        elif mime_type == PDF_MIME:
+            result["metadata"] = extract_metadata_pdf(ctx, content)
             
-        elif mime_type in (
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        ):
-            result["metadata"] = extract_metadata_docx(safe_path)
+        elif mime_type in DOCX_MIMES:
+            result["metadata"] = extract_metadata_docx(ctx)
             
         else:
             result["metadata"] = {"info": "Format not currently supported for deep analysis."}
@@ -275,7 +631,7 @@ def extract_metadata_auto(file_path: str | Path) -> Dict[str, Any]:
             # Respaldo para cuando se ejecuta desde la raíz del proyecto
             from src.security import analyze_risk
             
-        security_report = analyze_risk(safe_path, result["metadata"], mime_type)
+        security_report = analyze_risk(safe_path, result["metadata"], mime_type, content=content)
         if security_report["is_suspicious"]:
             result["security_analysis"] = security_report
             
@@ -283,9 +639,62 @@ def extract_metadata_auto(file_path: str | Path) -> Dict[str, Any]:
         print(f"Error analyzing {safe_path}: {e}")
         result["metadata"] = {"error": str(e)}
         
+    finally:
+        if content is not None:
+            content.close()
+        
     return result
 
 
-def format_metadata(metadata: Dict[str, Any]) -> str:
-    """Imprime los metadatos como JSON formateado."""
-    return json.dumps(metadata, indent=4, ensure_ascii=False)
+def _extract_metadata_safe(file_path: str) -> Dict[str, Any]:
+    """
+    Igual que :func:`extract_metadata_auto`, pero devuelve el error en el resultado
+    en lugar de propagarlo, para que un archivo inválido no aborte todo el lote.
+    """
+    try:
+        return extract_metadata_auto(file_path)
+    except Exception as e:
+        return {
+            "file": os.path.basename(file_path),
+            "path": file_path,
+            "metadata": {"error": str(e)},
+        }
+
+
+def extract_metadata_batch(
+    file_paths: Iterable[str | Path],
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Analiza varios archivos en paralelo usando un proceso por núcleo.
+    Devuelve los resultados de :func:`extract_metadata_auto` en el mismo orden que *file_paths*;
+    los archivos que no se pueden analizar aparecen con ``{"error": ...}`` en sus metadatos.
+    """
+    paths = [str(p) for p in file_paths]
+    workers = workers or os.cpu_count() or 1
+    
+    # Para un solo archivo no compensa arrancar el pool
+    if workers <= 1 or len(paths) <= 1:
+        return [_extract_metadata_safe(p) for p in paths]
+
+    workers = min(workers, len(paths))
+    chunksize = max(1, min(16, len(paths) // workers))
+    
+    # "spawn" evita los problemas de fork en macOS (Tk, libmagic)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(_extract_metadata_safe, paths, chunksize=chunksize))
+
+
+# Codificadores reutilizables: json.dumps con argumentos crea un JSONEncoder nuevo en cada llamada
+_PRETTY_ENCODER = json.JSONEncoder(indent=4, ensure_ascii=False, check_circular=False, default=str)
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, check_circular=False, default=str)
+
+
+def format_metadata(metadata: Dict[str, Any], compact: bool = False) -> str:
+    """
+    Imprime los metadatos como JSON formateado.
+    Con *compact* devuelve JSON sin espacios, pensado para consumo programático.
+    """
+    encoder = _COMPACT_ENCODER if compact else _PRETTY_ENCODER
+    return encoder.encode(metadata)
@@ -3,57 +3,131 @@ Ayudantes para detectar y validar extensiones de archivo usando libmagic.
 """
 from __future__ import annotations
 
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import puremagic
 
 from utils.mime_tools import EXTENSIONES_MIME, guess_extension_from_mime
-from utils.path_tools import ensure_readable_file
+from utils.path_tools import FileCtx, ensure_readable_file
 
 
-def get_mime_type(file_path: str | Path) -> Optional[str]:
+# Firmas de los formatos que analizamos; si la cabecera coincide no hace falta puremagic
+MAGIC_SIGNATURES: tuple[tuple[bytes, str], ...] = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+# Marcas del box "ftyp" de los contenedores HEIF (ISOBMFF)
+HEIF_BRANDS: dict[bytes, str] = {
+    b"heic": "image/heic",
+    b"heix": "image/heic",
+    b"heim": "image/heic",
+    b"heis": "image/heic",
+    b"hevc": "image/heic",
+    b"hevx": "image/heic",
+    b"mif1": "image/heif",
+    b"msf1": "image/heif",
+    b"heif": "image/heif",
+}
+HEIF_MIMES = frozenset(HEIF_BRANDS.values())
+
+# Bytes de cabecera necesarios para reconocer las firmas anteriores
+_SIGNATURE_PROBE_SIZE = 16
+
+
+def _mime_from_signature(head: bytes, extension: str) -> Optional[str]:
     """
-    Devuelve el tipo MIME reportado por libmagic.
-    Si hay múltiples coincidencias, prioriza la que coincida con la extensión del archivo.
+    Reconoce por su firma los formatos principales (PDF, JPEG, PNG, HEIC/HEIF).
+    Devuelve ``None`` si la cabecera no corresponde a ninguno.
     """
-    try:
-        safe_path = ensure_readable_file(file_path)
-        # Usamos magic_file para obtener todas las posibles coincidencias con confianza
-        matches = puremagic.magic_file(str(safe_path))
-        
-        if not matches:
-            return None
+    for signature, mime_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+            
+    if head[4:8] == b"ftyp":
+        brand_mime = HEIF_BRANDS.get(head[8:12])
+        if brand_mime:
+            # HEIC y HEIF comparten contenedor: se prioriza el que espera la extensión
+            expected_mime = EXTENSIONES_MIME.get(extension)
+            return expected_mime if expected_mime in HEIF_MIMES else brand_mime
             
-        # Si solo hay una coincidencia, la devolvemos
-        if len(matches) == 1:
-            return matches[0].mime_type
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _get_mime_type_cached(path_str: str, mtime_ns: int, size: int) -> Optional[str]:
+    """
+    Detecta el tipo MIME de *path_str* con puremagic.
+    La fecha de modificación y el tamaño forman parte de la clave de la caché
+    para que un archivo modificado vuelva a analizarse.
+    """
+    current_ext = Path(path_str).suffix.lower()
+    
+    with open(path_str, "rb") as f:
+        # Los formatos conocidos se reconocen por su firma sin el escaneo completo de puremagic
+        known = _mime_from_signature(f.read(_SIGNATURE_PROBE_SIZE), current_ext)
+        if known:
+            return known
             
-        # Si hay múltiples, buscamos si alguna coincide con la extensión actual
-        current_ext = safe_path.suffix.lower()
-        expected_mime = EXTENSIONES_MIME.get(current_ext)
+        # Reutilizamos el mismo descriptor para puremagic
+        f.seek(0)
+        matches = puremagic.magic_stream(f, filename=path_str)
+    
+    if not matches:
+        return None
         
-        if expected_mime:
-            for match in matches:
-                if match.mime_type == expected_mime:
-                    return match.mime_type
-                    
-        # Si no hay coincidencia con la extensión, devolvemos la de mayor confianza (la primera)
+    # Si solo hay una coincidencia, la devolvemos
+    if len(matches) == 1:
         return matches[0].mime_type
         
+    # Si hay múltiples, buscamos si alguna coincide con la extensión actual
+    expected_mime = EXTENSIONES_MIME.get(current_ext)
+    
+    if expected_mime:
+        for match in matches:
+            if match.mime_type == expected_mime:
+                return match.mime_type
+                
+    # Si no hay coincidencia con la extensión, devolvemos la de mayor confianza (la primera)
+    return matches[0].mime_type
+
+
+def get_mime_type(
+    file_path: str | Path | FileCtx,
+    stat_result: Optional[os.stat_result] = None,
+) -> Optional[str]:
+    """
+    Devuelve el tipo MIME reportado por libmagic.
+    Si hay múltiples coincidencias, prioriza la que coincida con la extensión del archivo.
+    Los resultados se cachean por (ruta, mtime, tamaño); si el llamador ya hizo
+    ``stat()`` puede pasarlo en *stat_result* (o pasar un :class:`FileCtx`) para no repetirlo.
+    """
+    try:
+        safe_path = ensure_readable_file(file_path)
+        if stat_result is None and isinstance(file_path, FileCtx):
+            stat_result = file_path.stat_result
+        st = stat_result if stat_result is not None else safe_path.stat()
+        return _get_mime_type_cached(str(safe_path), st.st_mtime_ns, st.st_size)
+        
     except FileNotFoundError:
         raise
     except Exception:
         return None
 
 
-def extension_matches_mime(file_path: str | Path) -> bool:
+def extension_matches_mime(file_path: str | Path, mime_type: Optional[str] = None) -> bool:
     """
     Comprueba si la extensión del archivo coincide con su tipo MIME detectado.
+    Si el llamador ya conoce el tipo MIME puede pasarlo en *mime_type*.
     """
     safe_path = ensure_readable_file(file_path)
     current_extension = safe_path.suffix.lower()
-    mime_type = get_mime_type(safe_path)
+    if mime_type is None:
+        mime_type = get_mime_type(safe_path)
     
     if mime_type is None:
         return False
@@ -61,13 +135,15 @@ def extension_matches_mime(file_path: str | Path) -> bool:
     return EXTENSIONES_MIME.get(current_extension) == mime_type
 
 
-def suggest_correct_extension(file_path: str | Path) -> Optional[str]:
+def suggest_correct_extension(file_path: str | Path, mime_type: Optional[str] = None) -> Optional[str]:
     """
     Sugiere la extensión correcta basada en el tipo MIME del archivo.
     Devuelve None si la extensión actual ya es correcta o si es desconocida.
+    Si el llamador ya conoce el tipo MIME puede pasarlo en *mime_type*.
     """
     safe_path = ensure_readable_file(file_path)
-    mime_type = get_mime_type(safe_path)
+    if mime_type is None:
+        mime_type = get_mime_type(safe_path)
     
     if mime_type is None:
         return None
@@ -7,26 +7,26 @@ from pathlib import Path
 from typing import Literal, Optional
 
 from core.detect_extension import get_mime_type
+from utils.mime_tools import DOCX_MIMES, IMAGE_PREFIX, PDF_MIME
 from utils.path_tools import ensure_readable_file
 
 FileType = Literal["image", "pdf", "docx", "unknown"]
 
+DOCX_EXTENSIONS = frozenset({".doc", ".docx"})
+
 
 def _infer_file_type(extension: str, mime_type: Optional[str]) -> FileType:
     """
     Determina el tipo de archivo basándose en el tipo MIME y la extensión.
     Prioriza el tipo MIME pero recurre a la extensión si es necesario.
     """
-    if mime_type and mime_type.startswith("image/"):
+    if mime_type and mime_type.startswith(IMAGE_PREFIX):
         return "image"
         
-    if mime_type == "application/pdf" or extension == ".pdf":
+    if mime_type == PDF_MIME or extension == ".pdf":
         return "pdf"
         
-    if mime_type in (
-        "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    ) or extension in {".doc", ".docx"}:
+    if mime_type in DOCX_MIMES or extension in DOCX_EXTENSIONS:
         return "docx"
         
     return "unknown"
@@ -3,16 +3,119 @@ Aplica metadatos personalizados a archivos soportados.
 """
 from __future__ import annotations
 
+import os
+import shutil
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Optional
 
 import piexif
 import piexif.helper
 from PIL import Image, PngImagePlugin
 from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    create_string_object,
+)
 from docx import Document
 
-from .utils_modifier import ensure_editable_file, ensure_output_path, normalize_metadata_dict
+from .utils_modifier import (
+    PDF_READ_BUFFER,
+    ensure_editable_file,
+    ensure_output_path,
+    normalize_metadata_dict,
+)
+
+
+def _find_startxref(stream: BinaryIO) -> int:
+    """Devuelve el desplazamiento indicado por el último ``startxref`` del PDF."""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(max(0, size - 1024))
+    tail = stream.read()
+    pos = tail.rfind(b"startxref")
+    if pos == -1:
+        raise ValueError("startxref not found")
+    return int(tail[pos + len(b"startxref"):].split()[0])
+
+
+def _append_pdf_info_update(source_file: Path, output_file: Path, metadata: Dict[str, str]) -> bool:
+    """
+    Copia el PDF tal cual y le añade una actualización incremental con un nuevo
+    diccionario /Info (objeto nuevo + sección xref + trailer con /Prev).
+    Las páginas y el resto de objetos no se vuelven a serializar.
+    Devuelve ``False`` si el documento no admite este camino (ej. cifrado).
+    """
+    with source_file.open("rb", buffering=PDF_READ_BUFFER) as src:
+        reader = PdfReader(src)
+        if reader.is_encrypted:
+            return False
+            
+        trailer = reader.trailer
+        if "/Root" not in trailer:
+            return False
+            
+        prev_xref = _find_startxref(src)
+        src.seek(prev_xref)
+        xref_is_stream = src.read(4) != b"xref"
+        
+        # Conserva las entradas existentes (incluidas referencias indirectas) y añade las nuevas
+        info = DictionaryObject()
+        info.update(reader.metadata or {})
+        for k, v in metadata.items():
+            info[NameObject(f"/{k}")] = create_string_object(v)
+            
+        # PyPDF2 no conserva /Size en el trailer de los flujos xref: se deduce de los objetos leídos
+        known_ids = [idnum for table in reader.xref.values() for idnum in table]
+        known_ids.extend(reader.xref_objStm)
+        info_num = max(int(trailer.get("/Size", 0)), max(known_ids, default=0) + 1)
+        new_trailer = DictionaryObject()
+        new_trailer[NameObject("/Root")] = trailer.raw_get("/Root")
+        new_trailer[NameObject("/Info")] = IndirectObject(info_num, 0, None)
+        new_trailer[NameObject("/Prev")] = NumberObject(prev_xref)
+        if "/ID" in trailer:
+            new_trailer[NameObject("/ID")] = trailer.raw_get("/ID")
+
+    shutil.copyfile(source_file, output_file)
+    
+    with output_file.open("r+b") as out:
+        end = out.seek(0, os.SEEK_END)
+        update = BytesIO()
+        update.write(b"\n")
+        
+        info_offset = end + update.tell()
+        update.write(f"{info_num} 0 obj\n".encode())
+        info.write_to_stream(update, None)
+        update.write(b"\nendobj\n")
+        
+        xref_offset = end + update.tell()
+        if xref_is_stream:
+            # El documento usa flujos de referencias cruzadas: la actualización también
+            entries = b"".join(
+                b"\x01" + offset.to_bytes(8, "big") + b"\x00\x00"
+                for offset in (info_offset, xref_offset)
+            )
+            new_trailer[NameObject("/Type")] = NameObject("/XRef")
+            new_trailer[NameObject("/Size")] = NumberObject(info_num + 2)
+            new_trailer[NameObject("/Index")] = ArrayObject([NumberObject(info_num), NumberObject(2)])
+            new_trailer[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(8), NumberObject(2)])
+            new_trailer[NameObject("/Length")] = NumberObject(len(entries))
+            update.write(f"{info_num + 1} 0 obj\n".encode())
+            new_trailer.write_to_stream(update, None)
+            update.write(b"\nstream\n" + entries + b"\nendstream\nendobj\n")
+        else:
+            new_trailer[NameObject("/Size")] = NumberObject(info_num + 1)
+            update.write(f"xref\n{info_num} 1\n{info_offset:010d} 00000 n\r\ntrailer\n".encode())
+            new_trailer.write_to_stream(update, None)
+            
+        update.write(f"\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        out.write(update.getvalue())
+        
+    return True
 
 
 def apply_custom_pdf_metadata(
@@ -28,22 +131,31 @@ def apply_custom_pdf_metadata(
     source_file = ensure_editable_file(file_path)
     output_file = ensure_output_path(source_file, destination, suffix="_custom")
     
-    reader = PdfReader(str(source_file))
-    writer = PdfWriter()
+    # Camino rápido: añadir solo un nuevo /Info al final sin reescribir el documento
+    try:
+        if _append_pdf_info_update(source_file, output_file, normalized_data):
+            return output_file
+    except Exception as e:
+        print(f"Warning: Incremental PDF update failed, rewriting document: {e}")
     
-    # Copia todas las páginas
-    for page in reader.pages:
-        writer.add_page(page)
+    # El lector trabaja sobre el manejador abierto, que debe seguir vivo hasta escribir
+    with source_file.open("rb", buffering=PDF_READ_BUFFER) as src:
+        reader = PdfReader(src)
+        writer = PdfWriter()
         
-    # Obtiene metadatos existentes y los fusiona con los nuevos
-    metadata_to_write = dict(reader.metadata) if reader.metadata else {}
-    for k, v in normalized_data.items():
-        metadata_to_write[f"/{k}"] = v
+        # Copia todas las páginas
+        for page in reader.pages:
+            writer.add_page(page)
+            
+        # Obtiene metadatos existentes y los fusiona con los nuevos
+        metadata_to_write = dict(reader.metadata) if reader.metadata else {}
+        for k, v in normalized_data.items():
+            metadata_to_write[f"/{k}"] = v
+            
+        writer.add_metadata(metadata_to_write)
         
-    writer.add_metadata(metadata_to_write)
-    
-    with output_file.open("wb") as f:
-        writer.write(f)
+        with output_file.open("wb") as f:
+            writer.write(f)
         
     return output_file
 
@@ -101,11 +213,13 @@ def apply_custom_image_metadata(
         
         if format_name in {"JPEG", "JPG", "TIFF", "MPO", "HEIC", "HEIF"}:
             # Maneja EXIF para JPEGs
-            try:
-                exif_dict = piexif.load(img.info.get("exif", b""))
-            except Exception as e:
-                print(f"Warning: Failed to load EXIF data: {e}")
-                exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
+            original_exif = img.info.get("exif", b"")
+            exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
+            if original_exif:
+                try:
+                    exif_dict = piexif.load(original_exif)
+                except Exception as e:
+                    print(f"Warning: Failed to load EXIF data: {e}")
 
             zeroth_ifd = exif_dict.get("0th", {})
             exif_ifd = exif_dict.get("Exif", {})
@@ -121,6 +235,8 @@ def apply_custom_image_metadata(
             }
 
             custom_data = {}
+            # Solo se vuelve a serializar el EXIF si alguna etiqueta cambia de verdad
+            dirty = False
             
             for key, value in normalized_data.items():
                 key_lower = key.lower()
@@ -130,7 +246,10 @@ def apply_custom_image_metadata(
                     value = value[:10].replace("-", ":") + value[10:]
 
                 if key_lower in known_tags:
-                    zeroth_ifd[known_tags[key_lower]] = value
+                    tag = known_tags[key_lower]
+                    if zeroth_ifd.get(tag) not in (value, value.encode("utf-8")):
+                        zeroth_ifd[tag] = value
+                        dirty = True
                 else:
                     custom_data[key] = value
             
@@ -139,13 +258,17 @@ def apply_custom_image_metadata(
                 import json
                 user_comment = json.dumps(custom_data, ensure_ascii=False)
                 exif_ifd[piexif.ExifIFD.UserComment] = piexif.helper.UserComment.dump(user_comment, encoding="unicode")
+                dirty = True
 
             exif_dict["0th"] = zeroth_ifd
             exif_dict["Exif"] = exif_ifd
             
             try:
-                exif_bytes = piexif.dump(exif_dict)
-                img.save(str(output_file), format=img.format, exif=exif_bytes)
+                exif_bytes = piexif.dump(exif_dict) if dirty else original_exif
+                if exif_bytes:
+                    img.save(str(output_file), format=img.format, exif=exif_bytes)
+                else:
+                    img.save(str(output_file), format=img.format)
             except Exception as e:
                 print(f"Error saving EXIF data: {e}")
                 # Respaldo: guardar sin EXIF si falla el volcado
@@ -12,7 +12,7 @@ from PIL import Image, PngImagePlugin
 from PyPDF2 import PdfReader, PdfWriter
 from docx import Document
 
-from .utils_modifier import ensure_editable_file, ensure_output_path
+from .utils_modifier import PDF_READ_BUFFER, ensure_editable_file, ensure_output_path
 
 DEFAULT_AUTHOR = "MetadataAnalyzer"
 DEFAULT_TITLE = "Processed Document"
@@ -30,22 +30,23 @@ def apply_default_pdf_metadata(file_path: str | Path, destination: Optional[str
     source_file = ensure_editable_file(file_path)
     output_file = ensure_output_path(source_file, destination, suffix="_default")
     
-    reader = PdfReader(str(source_file))
-    writer = PdfWriter()
-    
-    for page in reader.pages:
-        writer.add_page(page)
+    with source_file.open("rb", buffering=PDF_READ_BUFFER) as src:
+        reader = PdfReader(src)
+        writer = PdfWriter()
         
-    writer.add_metadata({
-        "/Author": DEFAULT_AUTHOR,
-        "/Title": DEFAULT_TITLE,
-        "/Producer": "MetadataAnalyzer Tool",
-        "/Creator": "Automated CLI",
-        "/CreationDate": _get_current_timestamp(),
-    })
-    
-    with output_file.open("wb") as f:
-        writer.write(f)
+        for page in reader.pages:
+            writer.add_page(page)
+            
+        writer.add_metadata({
+            "/Author": DEFAULT_AUTHOR,
+            "/Title": DEFAULT_TITLE,
+            "/Producer": "MetadataAnalyzer Tool",
+            "/Creator": "Automated CLI",
+            "/CreationDate": _get_current_timestamp(),
+        })
+        
+        with output_file.open("wb") as f:
+            writer.write(f)
         
     return output_file
 
@@ -8,6 +8,9 @@ from typing import Any, Dict
 
 from utils.path_tools import ensure_readable_file, resolve_path
 
+# Tamaño del búfer de lectura para los PDFs de origen (1 MiB)
+PDF_READ_BUFFER = 1 << 20
+
 
 def ensure_editable_file(file_path: str | Path) -> Path:
     """
@@ -3,14 +3,15 @@ Rutinas para eliminar metadatos de archivos soportados.
 """
 from __future__ import annotations
 
+import mmap
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from PIL import Image
 from PyPDF2 import PdfReader, PdfWriter
 from docx import Document
 
-from .utils_modifier import ensure_editable_file, ensure_output_path
+from .utils_modifier import PDF_READ_BUFFER, ensure_editable_file, ensure_output_path
 
 
 def wipe_metadata_pdf(file_path: str | Path, destination: Optional[str | Path] = None) -> Path:
@@ -20,17 +21,18 @@ def wipe_metadata_pdf(file_path: str | Path, destination: Optional[str | Path] =
     source_file = ensure_editable_file(file_path)
     output_file = ensure_output_path(source_file, destination, suffix="_clean")
     
-    reader = PdfReader(str(source_file))
-    writer = PdfWriter()
-    
-    for page in reader.pages:
-        writer.add_page(page)
+    with source_file.open("rb", buffering=PDF_READ_BUFFER) as src:
+        reader = PdfReader(src)
+        writer = PdfWriter()
         
-    # Sobrescribe los metadatos con un diccionario vacío
-    writer.add_metadata({})
-    
-    with output_file.open("wb") as f:
-        writer.write(f)
+        for page in reader.pages:
+            writer.add_page(page)
+            
+        # Sobrescribe los metadatos con un diccionario vacío
+        writer.add_metadata({})
+        
+        with output_file.open("wb") as f:
+            writer.write(f)
         
     return output_file
 
@@ -58,18 +60,138 @@ def wipe_metadata_docx(file_path: str | Path, destination: Optional[str | Path]
     return output_file
 
 
+# Segmentos APPn de JPEG que se conservan porque describen cómo decodificar la imagen
+# (JFIF y la transformación de color de Adobe), no al autor
+_JPEG_KEPT_APP_SEGMENTS = {
+    0xE0: b"JFIF\x00",
+    0xEE: b"Adobe",
+}
+
+# Chunks de PNG con metadatos textuales, EXIF o la fecha de modificación
+_PNG_METADATA_CHUNKS = frozenset({b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"})
+
+
+def _jpeg_kept_ranges(data: mmap.mmap) -> Optional[List[Tuple[int, int]]]:
+    """
+    Devuelve los rangos de bytes del JPEG que se conservan al quitar los segmentos
+    APPn y COM. Los datos de imagen (desde SOS hasta EOI) se copian tal cual.
+    Devuelve ``None`` si el archivo no es un JPEG que podamos recorrer.
+    """
+    size = len(data)
+    if data[:2] != b"\xff\xd8":
+        return None
+        
+    ranges = [(0, 2)]
+    pos = 2
+    while pos + 2 <= size:
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        # Bytes de relleno entre marcadores
+        if marker == 0xFF:
+            pos += 1
+            continue
+        # Marcadores sin longitud (TEM, RSTn)
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            ranges.append((pos, pos + 2))
+            pos += 2
+            continue
+        if marker == 0xD9:
+            ranges.append((pos, pos + 2))
+            return ranges
+            
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        end = pos + 2 + length
+        if length < 2 or end > size:
+            return None
+            
+        if marker == 0xDA:
+            # En los datos comprimidos 0xFF siempre va seguido de 0x00 o RSTn,
+            # así que la primera aparición de EOI marca el final de la imagen
+            eoi = data.find(b"\xff\xd9", end)
+            if eoi == -1:
+                return None
+            ranges.append((pos, eoi + 2))
+            return ranges
+            
+        is_metadata = 0xE0 <= marker <= 0xEF or marker == 0xFE
+        kept_id = _JPEG_KEPT_APP_SEGMENTS.get(marker)
+        if is_metadata and not (kept_id and data[pos + 4:pos + 4 + len(kept_id)] == kept_id):
+            pos = end
+            continue
+            
+        ranges.append((pos, end))
+        pos = end
+        
+    return None
+
+
+def _png_kept_ranges(data: mmap.mmap) -> Optional[List[Tuple[int, int]]]:
+    """
+    Devuelve los rangos de bytes del PNG sin los chunks de metadatos.
+    Los chunks conservados se copian con su CRC original.
+    Devuelve ``None`` si el archivo no es un PNG que podamos recorrer.
+    """
+    size = len(data)
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+        
+    ranges = [(0, 8)]
+    pos = 8
+    while pos + 12 <= size:
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        # longitud + tipo + datos + CRC
+        end = pos + 12 + length
+        if end > size:
+            return None
+        if chunk_type not in _PNG_METADATA_CHUNKS:
+            ranges.append((pos, end))
+        if chunk_type == b"IEND":
+            return ranges
+        pos = end
+        
+    return None
+
+
+def _strip_image_segments(source_file: Path) -> Optional[List[bytes]]:
+    """
+    Elimina los metadatos de un JPEG o PNG sin decodificar los píxeles.
+    Devuelve los fragmentos del archivo limpio o ``None`` si el formato no se reconoce.
+    """
+    try:
+        with source_file.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ranges = _jpeg_kept_ranges(data) or _png_kept_ranges(data)
+            if not ranges:
+                return None
+            # Se copian antes de cerrar el mmap (el destino podría ser el mismo archivo)
+            return [data[start:end] for start, end in ranges]
+    except (OSError, ValueError):
+        return None
+
+
 def wipe_metadata_image(file_path: str | Path, destination: Optional[str | Path] = None) -> Path:
     """
-    Crea una copia de la imagen sin datos EXIF copiando los datos de píxeles a una nueva imagen.
+    Crea una copia de la imagen sin metadatos.
+    Para JPEG y PNG elimina los segmentos de metadatos sin volver a codificar la imagen (sin pérdidas);
+    para el resto copia los datos de píxeles a una nueva imagen.
     """
     source_file = ensure_editable_file(file_path)
     output_file = ensure_output_path(source_file, destination, suffix="_clean")
     
+    chunks = _strip_image_segments(source_file)
+    if chunks is not None:
+        with output_file.open("wb") as f:
+            f.writelines(chunks)
+        return output_file
+    
     with Image.open(str(source_file)) as img:
-        # Copia los datos de píxeles a un nuevo objeto de imagen para eliminar los metadatos
-        data = list(img.getdata())
+        # Copia los píxeles a una imagen nueva (sin info ni EXIF); paste trabaja en C
+        # y evita crear una tupla de Python por cada píxel
         clean_img = Image.new(img.mode, img.size)
-        clean_img.putdata(data)
+        clean_img.paste(img)
+        if img.mode == "P":
+            clean_img.putpalette(img.getpalette())
         clean_img.save(str(output_file), format=img.format)
         
     return output_file
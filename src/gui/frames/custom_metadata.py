@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 
-from ..config import BG_COLOR, FG_COLOR, APP_TITLE
+from ..config import BG_COLOR, APP_TITLE
 
 from core.modify_metadata.custom_metadata import (
     apply_custom_pdf_metadata,
@@ -10,6 +10,16 @@ from core.modify_metadata.custom_metadata import (
     apply_custom_image_metadata
 )
 
+_DOCX_EXTS = frozenset({".docx", ".doc"})
+_IMG_EXTS = frozenset({".jpg", ".jpeg", ".png", ".heic"})
+
+# Custom metadata writer for each supported extension
+_APPLY = {
+    ".pdf": apply_custom_pdf_metadata,
+    **dict.fromkeys(_DOCX_EXTS, apply_custom_docx_metadata),
+    **dict.fromkeys(_IMG_EXTS, apply_custom_image_metadata),
+}
+
 class CustomMetadataFrame(tk.Frame):
     """
     Screen 3: Modify/Add Custom Metadata
@@ -17,7 +27,7 @@ class CustomMetadataFrame(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent, bg=BG_COLOR)
         self.controller = controller
-        self.entries = [] # List of (key_entry, value_entry) tuples
+        self.rows = {} # Treeview item id -> [key, value] (raw strings, Treeview would coerce numbers)
 
         # Header
         header_frame = tk.Frame(self, bg=BG_COLOR)
@@ -34,21 +44,31 @@ class CustomMetadataFrame(tk.Frame):
         lbl_subtitle = ttk.Label(self, text="Setting Custom Metadata", font=("Helvetica", 16, "bold"))
         lbl_subtitle.pack(pady=10)
 
-        # Scrollable Form Area
-        self.canvas = tk.Canvas(self, bg=BG_COLOR, highlightthickness=0)
-        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = tk.Frame(self.canvas, bg=BG_COLOR)
+        # Key/Value Table (Treeview only draws the visible rows)
+        table_frame = tk.Frame(self, bg=BG_COLOR)
+        table_frame.pack(side="top", fill="both", expand=True, padx=40)
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+        self.tree = ttk.Treeview(table_frame, columns=("key", "value"), show="headings", selectmode="browse")
+        self.tree.heading("key", text="Key", anchor="w")
+        self.tree.heading("value", text="Value", anchor="w")
+        self.tree.column("key", width=200, stretch=False)
+        self.tree.column("value", width=400)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
 
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        # Double-click a cell to edit it in place
+        self.tree.bind("<Double-1>", self.start_edit)
 
-        self.canvas.pack(side="top", fill="both", expand=True, padx=40)
-        self.scrollbar.place(relx=1.0, rely=0, relheight=1.0, anchor="ne") # Simple placement
+        # Add button / DOCX hint (only one of them is shown)
+        actions_frame = tk.Frame(self, bg=BG_COLOR)
+        actions_frame.pack(side="top", fill="x", padx=40)
+
+        self.btn_add = ttk.Button(actions_frame, text="+", width=5, command=self.add_field)
+        self.lbl_info = tk.Label(actions_frame, text="(DOCX: Only existing fields can be modified)", 
+                                 bg=BG_COLOR, fg="#A0A0A0", font=("Helvetica", 10, "italic"))
 
         # Footer Buttons
         footer_frame = tk.Frame(self, bg=BG_COLOR)
@@ -57,7 +77,14 @@ class CustomMetadataFrame(tk.Frame):
         ttk.Button(footer_frame, text="Cancel", command=self.cancel).pack(side="left", padx=10)
         ttk.Button(footer_frame, text="Save", command=self.save_changes).pack(side="right", padx=10)
         
-        self.btn_add = ttk.Button(self.scrollable_frame, text="+", width=3, command=self.add_field)
+        # Floating editor placed over the cell being edited
+        self.editor = ttk.Entry(self.tree)
+        self.editor.bind("<Return>", self.finish_edit)
+        self.editor.bind("<KP_Enter>", self.finish_edit)
+        self.editor.bind("<FocusOut>", self.finish_edit)
+        self.editor.bind("<Escape>", self.cancel_edit)
+        self._editing = None # (item id, column index) being edited
+        self._docx_mode = None # Whether the add button or the DOCX hint is currently packed
 
     def on_show(self):
         path = self.controller.get_selected_file()
@@ -68,81 +95,109 @@ class CustomMetadataFrame(tk.Frame):
         self.controller.show_frame("FileSelectFrame")
 
     def populate_fields(self):
-        # Clear existing
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.entries = []
-
-        # Headers
-        tk.Label(self.scrollable_frame, text="Key", bg=BG_COLOR, fg=FG_COLOR, font=("Helvetica", 12, "bold")).grid(row=0, column=0, padx=10, pady=5, sticky="w")
-        tk.Label(self.scrollable_frame, text="Value", bg=BG_COLOR, fg=FG_COLOR, font=("Helvetica", 12, "bold")).grid(row=0, column=1, padx=10, pady=5, sticky="w")
+        self.cancel_edit()
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
 
         # Data rows
-        row = 1
         for key, value in self.controller.current_metadata.items():
-            self._create_row(row, key, value)
-            row += 1
-        
-        self.next_row = row
+            self._insert_row(key, value)
         
         # Check file type to conditionally show Add button
         file_path = self.controller.get_selected_file()
-        ext = os.path.splitext(file_path)[1].lower()
+        try:
+            ext, _ = self.controller.get_file_info(file_path)
+        except (OSError, ValueError):
+            ext = os.path.splitext(file_path)[1].lower()
         
-        if ext in [".docx", ".doc"]:
+        # Only re-pack when switching between DOCX and other files
+        docx_mode = ext in _DOCX_EXTS
+        if docx_mode == self._docx_mode:
+            return
+        self._docx_mode = docx_mode
+        if docx_mode:
             # For DOCX, we restrict adding new fields
-            lbl_info = tk.Label(self.scrollable_frame, text="(DOCX: Only existing fields can be modified)", 
-                                bg=BG_COLOR, fg="#A0A0A0", font=("Helvetica", 10, "italic"))
-            lbl_info.grid(row=self.next_row, column=0, columnspan=2, pady=10)
+            self.btn_add.pack_forget()
+            self.lbl_info.pack(pady=10)
         else:
             # For other files, allow adding new fields
-            self.btn_add = ttk.Button(self.scrollable_frame, text="+", width=5, command=self.add_field)
-            self.btn_add.grid(row=self.next_row, column=1, sticky="e", pady=10)
+            self.lbl_info.pack_forget()
+            self.btn_add.pack(side="right", pady=10)
 
-    def _create_row(self, row, key_text="", val_text=""):
-        key_entry = ttk.Entry(self.scrollable_frame, width=20)
-        key_entry.insert(0, str(key_text))
-        key_entry.grid(row=row, column=0, padx=10, pady=5)
-
-        val_entry = ttk.Entry(self.scrollable_frame, width=40)
-        val_entry.insert(0, str(val_text))
-        val_entry.grid(row=row, column=1, padx=10, pady=5)
-        
-        self.entries.append((key_entry, val_entry))
+    def _insert_row(self, key_text="", val_text=""):
+        row = [str(key_text), str(val_text)]
+        iid = self.tree.insert("", "end", values=row)
+        self.rows[iid] = row
+        return iid
 
     def add_field(self):
-        # Move add button down
-        self.btn_add.grid_forget()
-        self._create_row(self.next_row)
-        self.next_row += 1
-        self.btn_add.grid(row=self.next_row, column=1, sticky="e", pady=10)
+        iid = self._insert_row()
+        self.tree.see(iid)
+        # Start typing the new key right away
+        self.after_idle(lambda: self._open_editor(iid, 0))
+
+    def start_edit(self, event):
+        """Opens the floating editor on the double-clicked cell."""
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        iid = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x) # "#1" or "#2"
+        if iid:
+            self._open_editor(iid, int(column[1:]) - 1)
+
+    def _open_editor(self, iid, column_index):
+        self.finish_edit()
+        bbox = self.tree.bbox(iid, f"#{column_index + 1}")
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        self._editing = (iid, column_index)
+        self.editor.delete(0, tk.END)
+        self.editor.insert(0, self.rows[iid][column_index])
+        self.editor.place(x=x, y=y, width=width, height=height)
+        self.editor.focus_set()
+        self.editor.select_range(0, tk.END)
+
+    def finish_edit(self, event=None):
+        """Stores the editor text in the edited cell."""
+        if self._editing is None:
+            return
+        iid, column_index = self._editing
+        self._editing = None
+        self.editor.place_forget()
+        if iid in self.rows:
+            new_text = self.editor.get()
+            # Only touch the Treeview when the cell actually changed
+            if new_text != self.rows[iid][column_index]:
+                self.rows[iid][column_index] = new_text
+                self.tree.set(iid, self.tree["columns"][column_index], new_text)
+
+    def cancel_edit(self, event=None):
+        self._editing = None
+        self.editor.place_forget()
 
     def cancel(self):
         self.controller.show_frame("ResultsFrame")
 
     def save_changes(self):
+        self.finish_edit()
+        
         # Collect data
         new_metadata = {}
-        for k_ent, v_ent in self.entries:
-            k = k_ent.get().strip()
-            v = v_ent.get().strip()
+        for iid in self.tree.get_children():
+            k, v = (text.strip() for text in self.rows[iid])
             if k:
                 new_metadata[k] = v
         
         file_path = self.controller.get_selected_file()
-        ext = os.path.splitext(file_path)[1].lower()
         
         try:
-            output_path = None
-            if ext == ".pdf":
-                output_path = apply_custom_pdf_metadata(file_path, new_metadata)
-            elif ext in [".docx", ".doc"]:
-                output_path = apply_custom_docx_metadata(file_path, new_metadata)
-            elif ext in [".jpg", ".jpeg", ".png", ".heic"]:
-                output_path = apply_custom_image_metadata(file_path, new_metadata)
-            else:
+            ext, _ = self.controller.get_file_info(file_path)
+            apply = _APPLY.get(ext)
+            if apply is None:
                 messagebox.showerror("Error", f"Unsupported file format for modification: {ext}")
                 return
+            output_path = apply(file_path, new_metadata)
 
             if output_path:
                 messagebox.showinfo("Success", f"Metadata saved successfully!\n\nNew file created at:\n{output_path}")
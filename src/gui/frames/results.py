@@ -1,7 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import json
-import webbrowser
+import os
+import queue
+import re
+import threading
+import traceback
 
 from ..config import BG_COLOR, APP_TITLE
 
@@ -16,12 +20,88 @@ from core.modify_metadata.default_metadata import (
     apply_default_image_metadata,
     apply_default_pdf_metadata,
 )
-from core.file_loader import load_file_info
 from core.detect_extension import (
     extension_matches_mime,
     suggest_correct_extension
 )
 
+# Metadata wipers and default-template writers for each file type (see get_file_info)
+_WIPE = {
+    "pdf": wipe_metadata_pdf,
+    "docx": wipe_metadata_docx,
+    "image": wipe_metadata_image,
+}
+_APPLY_DEFAULT = {
+    "pdf": apply_default_pdf_metadata,
+    "docx": apply_default_docx_metadata,
+    "image": apply_default_image_metadata,
+}
+
+def _file_key(path):
+    """Identifies a file version by path, modification time and size (None if it can't be read)."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+# Single-pass JSON tokenizer used to color the output of json.dumps
+# (keys and URLs are told apart from plain strings in Python, so each string is scanned once)
+_JSON_TOKEN_RE = re.compile(
+    r'(?P<string>"(?:[^"\\]|\\.)*")'
+    r'|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)'
+    r'|(?P<bracket>[\[\]{}])'
+)
+
+def _json_segments(text, warn_security=False):
+    """
+    Scans the serialized JSON once and splits it into (text, tag) segments; the text
+    between tokens is untagged. If warn_security is set, the top-level "security_analysis"
+    entry is tagged as a warning (URLs keep their hyperlink tag).
+    """
+    segments = []
+    append = segments.append
+    pos = 0
+    depth = 0
+    warning_depth = None
+    for match in _JSON_TOKEN_RE.finditer(text):
+        tag = match.lastgroup
+        token = match.group()
+        start, end = match.span()
+        
+        if tag == "string":
+            if text.startswith(":", end):
+                tag = "key"
+            # Cheap length/first-char gate before the prefix test (token includes the quotes)
+            elif len(token) >= 9 and token[1] == "h" and token.startswith(('"http://', '"https://')):
+                tag = "hyperlink"
+                
+        if tag == "bracket":
+            if token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+        elif tag == "key" and warn_security and depth == 1 and token == '"security_analysis"':
+            warning_depth = depth
+            
+        if start > pos:
+            append((text[pos:start], None))
+        pos = end
+            
+        if warning_depth is not None and tag != "hyperlink":
+            append((token, "warning"))
+            # The warning ends with the scalar value or the bracket closing its container
+            if depth == warning_depth and tag != "key":
+                warning_depth = None
+        else:
+            append((token, tag))
+            
+    if pos < len(text):
+        append((text[pos:], None))
+    return segments
+
+
 class ResultsFrame(tk.Frame):
     """
     Screen 2: Analysis Results
@@ -49,8 +129,10 @@ class ResultsFrame(tk.Frame):
         self.console_frame = tk.Frame(self, bg=BG_COLOR)
         self.console_frame.pack(fill="both", expand=True, padx=40, pady=10)
         
+        # Read-only console: no undo stack or separator bookkeeping on inserts
         self.txt_console = tk.Text(self.console_frame, bg="#1E1E1E", fg="#D4D4D4", 
-                                   font=("Menlo", 12), relief="flat", padx=10, pady=10)
+                                   font=("Menlo", 12), relief="flat", padx=10, pady=10,
+                                   undo=False, autoseparators=False, maxundo=0)
         self.txt_console.pack(side="left", fill="both", expand=True)
         self.txt_console.config(state="disabled") # Make read-only by default
         
@@ -84,26 +166,52 @@ class ResultsFrame(tk.Frame):
         btn_frame.columnconfigure(2, weight=1)
         btn_frame.columnconfigure(3, weight=1)
 
-        ttk.Button(btn_frame, text="Save Report", command=self.save_report).grid(row=0, column=0, padx=5, sticky="ew")
-        ttk.Button(btn_frame, text="Delete All Metadata", command=self.delete_metadata).grid(row=0, column=1, padx=5, sticky="ew")
-        ttk.Button(btn_frame, text="Set Default Metadata", command=self.set_default_metadata).grid(row=0, column=2, padx=5, sticky="ew")
-        ttk.Button(btn_frame, text="Set Custom Metadata", command=self.go_to_custom).grid(row=0, column=3, padx=5, sticky="ew")
+        # Action buttons are disabled while an analysis is running
+        self.action_buttons = []
+        for column, (text, command) in enumerate((
+            ("Save Report", self.save_report),
+            ("Delete All Metadata", self.delete_metadata),
+            ("Set Default Metadata", self.set_default_metadata),
+            ("Set Custom Metadata", self.go_to_custom),
+        )):
+            btn = ttk.Button(btn_frame, text=text, command=command)
+            btn.grid(row=0, column=column, padx=5, sticky="ew")
+            self.action_buttons.append(btn)
+
+        # Background analysis: the worker thread posts (analysis_id, kind, payload)
+        # tuples and the Tk thread drains them with after()
+        self._result_q = queue.Queue()
+        self._analysis_id = 0
+        self._polling = False
+        # (path, mtime, size) of the file currently shown, to avoid re-analyzing it
+        self._last_analyzed = None
+        # (path, mtime, size) -> (extension matches, suggestion); new or rewritten files get new keys
+        self._mime_check_cache = {}
+        # Whether a see(END) is already scheduled, see request_see
+        self._see_pending = False
+        # (metadata dict, encoded JSON) of the last saved report
+        self._report_cache = None
 
     def on_show(self):
-        """Called when frame is shown."""
+        """Called when frame is shown. Skips the analysis if the file hasn't changed."""
         path = self.controller.get_selected_file()
+        if self._last_analyzed is not None and self._last_analyzed == _file_key(path):
+            return
         self.lbl_path.config(text=f"Analyzing: {path}")
         self.run_analysis(path)
 
     def change_file(self):
         self.controller.show_frame("FileSelectFrame")
 
-    def append_log(self, text, tag=None):
-        """Helper to append text to read-only console."""
-        self.txt_console.config(state="normal")
-        self.txt_console.insert(tk.END, text, tag)
+    def request_see(self):
+        """Scrolls the console to the end on the next idle tick (once, however many writes happen before)."""
+        if not self._see_pending:
+            self._see_pending = True
+            self.after_idle(self._flush_see)
+
+    def _flush_see(self):
+        self._see_pending = False
         self.txt_console.see(tk.END)
-        self.txt_console.config(state="disabled")
 
     def clear_log(self):
         """Helper to clear console."""
@@ -121,118 +229,165 @@ class ResultsFrame(tk.Frame):
                 start = self.txt_console.tag_prevrange("hyperlink", index + "+1c")
                 if start:
                     url = self.txt_console.get(start[0], start[1]).strip('"')
+                    # Only needed when a link is clicked
+                    import webbrowser
                     webbrowser.open(url)
         except Exception as e:
             print(f"Error opening URL: {e}")
 
-    def format_json_colored(self, data, indent=0, override_tag=None):
-        """Recursively formats dictionary as colored JSON."""
-        spaces = " " * (indent * 4)
-        
-        if isinstance(data, dict):
-            self.append_log("{\n", override_tag or "bracket")
-            for i, (key, value) in enumerate(data.items()):
-                self.append_log(spaces + "    ")
-                
-                # Special handling for security analysis
-                current_tag = override_tag
-                if key == "security_analysis":
-                    # Check if it's actually suspicious before highlighting
-                    if isinstance(value, dict) and value.get("is_suspicious"):
-                        current_tag = "warning"
-                        self.append_log(f'"{key}"', "warning")
-                    else:
-                        self.append_log(f'"{key}"', "key")
-                else:
-                    self.append_log(f'"{key}"', override_tag or "key")
-                    
-                self.append_log(": ", override_tag or "info")
-                
-                # Pass the current tag down (if it's warning, everything inside is warning)
-                self.format_json_colored(value, indent + 1, current_tag)
-                
-                if i < len(data) - 1:
-                    self.append_log(",\n", override_tag or "info")
-                else:
-                    self.append_log("\n", override_tag or "info")
-            self.append_log(spaces + "}", override_tag or "bracket")
-            
-        elif isinstance(data, list):
-            self.append_log("[\n", override_tag or "bracket")
-            for i, item in enumerate(data):
-                self.append_log(spaces + "    ")
-                self.format_json_colored(item, indent + 1, override_tag)
-                if i < len(data) - 1:
-                    self.append_log(",\n", override_tag or "info")
-                else:
-                    self.append_log("\n", override_tag or "info")
-            self.append_log(spaces + "]", override_tag or "bracket")
-            
-        elif isinstance(data, str):
-            # Check for URL
-            if data.startswith("http://") or data.startswith("https://"):
-                self.append_log(f'"{data}"', "hyperlink")
+    def insert_segments(self, segments):
+        """Appends a list of (text, tag) segments to the console with a single Text.insert call."""
+        self.txt_console.config(state="normal")
+        self._write_segments(segments)
+        self.request_see()
+        self.txt_console.config(state="disabled")
+
+    def _write_segments(self, segments):
+        """Inserts (text, tag) segments. The console must already be writable; doesn't scroll."""
+        args = []
+        last_tag = None
+        for text, tag in segments:
+            tag = tag or ""
+            # Merge consecutive segments sharing a tag into one chunk
+            if args and tag == last_tag:
+                args[-2] += text
             else:
-                self.append_log(f'"{data}"', override_tag or "string")
-            
-        elif isinstance(data, (int, float)):
-            self.append_log(f"{data}", override_tag or "number")
-            
-        elif data is None:
-            self.append_log("null", override_tag or "number")
-            
-        else:
-            self.append_log(str(data), override_tag or "info")
+                args += [text, tag]
+                last_tag = tag
+        if args:
+            self.txt_console.insert(tk.END, *args)
+
+    def _write_json(self, data):
+        """Inserts data as colored JSON. The console must already be writable; doesn't scroll."""
+        text = json.dumps(data, indent=4, ensure_ascii=False, default=str)
+        security = data.get("security_analysis") if isinstance(data, dict) else None
+        warn_security = isinstance(security, dict) and bool(security.get("is_suspicious"))
+        # Inserted as tagged chunks: Tk places the tags itself, so no character offsets
+        # are computed here (Tk counts characters outside the BMP differently than Python)
+        self._write_segments(_json_segments(text, warn_security))
 
     def run_analysis(self, path):
-        """Runs the actual analysis and updates console."""
+        """Starts the analysis in a worker thread so the UI stays responsive."""
         # Reset previous data
         self.clear_log()
-        self.controller.current_metadata = {} 
+        self.controller.current_metadata = {}
+        file_key = _file_key(path)
+        self._last_analyzed = file_key
+        
+        self.insert_segments([("--- Analysis Results ---\n", "header"), ("Analyzing…\n", "info")])
+        self.set_buttons_state("disabled")
         
-        self.append_log(f"--- Analysis Results ---\n", "header")
+        # Results of any previous analysis still running are discarded
+        self._analysis_id += 1
+        threading.Thread(target=self._do_analysis, args=(self._analysis_id, path, file_key), daemon=True).start()
         
+        if not self._polling:
+            self._polling = True
+            self.after(50, self._drain_results)
+
+    def _check_extension(self, path, file_key):
+        """Returns (extension matches, suggested extension), cached per file version."""
+        verdict = self._mime_check_cache.get(file_key) if file_key else None
+        if verdict is None:
+            matches = extension_matches_mime(path)
+            verdict = (matches, None if matches else suggest_correct_extension(path))
+            if file_key:
+                self._mime_check_cache[file_key] = verdict
+        return verdict
+
+    def _do_analysis(self, analysis_id, path, file_key=None):
+        """Worker thread: runs the blocking checks. Must not touch any Tk widget."""
         # Check for extension mismatch
+        mismatch = None
         try:
-            if not extension_matches_mime(path):
-                suggestion = suggest_correct_extension(path)
+            matches, suggestion = self._check_extension(path, file_key)
+            if not matches:
                 msg = f"Warning: The file extension does not match its content."
                 if suggestion:
                     msg += f"\nSuggested extension: {suggestion}"
-                
-                # Log to console
-                self.append_log(f"WARNING: {msg}\n", "warning")
-                
-                # Show popup
-                messagebox.showwarning("Extension Mismatch", msg)
+                mismatch = ("warning", msg)
         except Exception as e:
-            self.append_log(f"Error checking extension: {e}\n", "error")
+            mismatch = ("error", e)
 
         try:
             # Run the actual analysis
             result = extract_metadata_auto(path)
-            
+            self._result_q.put((analysis_id, "result", (mismatch, result)))
+        except Exception as e:
+            traceback.print_exc()
+            self._result_q.put((analysis_id, "error", (mismatch, e)))
+
+    def _drain_results(self):
+        """Polls the worker queue from the Tk main thread and renders finished analyses."""
+        while True:
+            try:
+                analysis_id, kind, (mismatch, payload) = self._result_q.get_nowait()
+            except queue.Empty:
+                break
+            if analysis_id == self._analysis_id:
+                self._show_analysis(kind, mismatch, payload)
+                self._polling = False
+                return
+        self.after(50, self._drain_results)
+
+    def _show_analysis(self, kind, mismatch, payload):
+        """Renders the outcome of a finished analysis in the console."""
+        self.set_buttons_state("normal")
+        
+        # Everything is collected as (text, tag) segments and inserted at once
+        segments = [("--- Analysis Results ---\n", "header")]
+        
+        if mismatch:
+            level, msg = mismatch
+            if level == "warning":
+                # Log to console
+                segments.append((f"WARNING: {msg}\n", "warning"))
+            else:
+                segments.append((f"Error checking extension: {msg}\n", "error"))
+
+        if kind == "error":
+            # Let the next on_show retry
+            self._last_analyzed = None
+            segments.append((f"Critical Error during analysis: {payload}\n", "error"))
+        else:
             # Store metadata for editing
-            self.controller.current_metadata = result.get("metadata", {})
-            
+            self.controller.current_metadata = payload.get("metadata", {})
+        
+        # Single writable window and a single scroll for the whole report
+        self.txt_console.config(state="normal")
+        self.txt_console.delete("1.0", tk.END)
+        self._write_segments(segments)
+        if kind != "error":
             # Display formatted JSON
-            self.format_json_colored(result)
-            self.append_log("\n")
-            
-            self.append_log("------------------------\n", "header")
+            self._write_json(payload)
+            self._write_segments([("\n", None), ("------------------------\n", "header")])
+        self.request_see()
+        self.txt_console.config(state="disabled")
+        
+        if mismatch and mismatch[0] == "warning":
+            # Show popup
+            messagebox.showwarning("Extension Mismatch", mismatch[1])
 
-        except Exception as e:
-            self.append_log(f"Critical Error during analysis: {e}\n", "error")
-            import traceback
-            traceback.print_exc()
+    def set_buttons_state(self, state):
+        """Enables or disables the action buttons."""
+        for btn in self.action_buttons:
+            btn.config(state=state)
+
+    def _report_bytes(self):
+        """Serialized report for the current metadata, encoded once and reused across saves."""
+        metadata = self.controller.current_metadata
+        if self._report_cache is None or self._report_cache[0] is not metadata:
+            text = json.dumps(metadata, indent=4, ensure_ascii=False)
+            self._report_cache = (metadata, text.encode("utf-8"))
+        return self._report_cache[1]
 
     def save_report(self):
         # Placeholder: In a real app, this would save the JSON content to a file
         path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if path:
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(self.controller.current_metadata, f, indent=4, ensure_ascii=False)
+                with open(path, 'wb') as f:
+                    f.write(self._report_bytes())
                 messagebox.showinfo("Success", f"Report saved to {path}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save report: {e}")
@@ -243,19 +398,13 @@ class ResultsFrame(tk.Frame):
             
         path = self.controller.get_selected_file()
         try:
-            file_info = load_file_info(path)
-            file_type = file_info["type"]
+            _, file_type = self.controller.get_file_info(path)
             
-            new_path = None
-            if file_type == "pdf":
-                new_path = wipe_metadata_pdf(path)
-            elif file_type == "docx":
-                new_path = wipe_metadata_docx(path)
-            elif file_type == "image":
-                new_path = wipe_metadata_image(path)
-            else:
+            handler = _WIPE.get(file_type)
+            if handler is None:
                 messagebox.showwarning("Unsupported", "We don't support wiping metadata for this file type yet.")
                 return
+            new_path = handler(path)
 
             if new_path:
                 messagebox.showinfo("Success", f"Clean file saved to:\n{new_path}")
@@ -271,19 +420,13 @@ class ResultsFrame(tk.Frame):
 
         path = self.controller.get_selected_file()
         try:
-            file_info = load_file_info(path)
-            file_type = file_info["type"]
+            _, file_type = self.controller.get_file_info(path)
             
-            new_path = None
-            if file_type == "pdf":
-                new_path = apply_default_pdf_metadata(path)
-            elif file_type == "docx":
-                new_path = apply_default_docx_metadata(path)
-            elif file_type == "image":
-                new_path = apply_default_image_metadata(path)
-            else:
+            handler = _APPLY_DEFAULT.get(file_type)
+            if handler is None:
                 messagebox.showwarning("Unsupported", "Unsupported file format for default metadata.")
                 return
+            new_path = handler(path)
 
             if new_path:
                 messagebox.showinfo("Success", f"File with default metadata created at:\n{new_path}")
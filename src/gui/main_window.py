@@ -7,6 +7,9 @@ from .config import (
     FONT_MAIN, FONT_HEADER, FONT_SMALL
 )
 
+from core.file_loader import load_file_info
+from utils.path_tools import clear_path_cache
+
 from .frames.file_select import FileSelectFrame
 from .frames.results import ResultsFrame
 from .frames.custom_metadata import CustomMetadataFrame
@@ -27,6 +30,8 @@ class MetadataAnalyzerApp(tk.Tk):
         self.selected_file_path = tk.StringVar()
         self.metadata_results = [] # Placeholder for analysis results
         self.current_metadata = {} # Placeholder for current metadata dict
+        self._path_meta_cache = {} # path -> (extension, file type), see get_file_info
+        self.selected_file_path.trace_add("write", self._clear_path_caches)
 
         # Style Configuration
         self._configure_styles()
@@ -39,17 +44,20 @@ class MetadataAnalyzerApp(tk.Tk):
 
         self.frames = {}
         
-        # Initialize Frames
-        for F in (FileSelectFrame, ResultsFrame, CustomMetadataFrame):
-            page_name = F.__name__
-            frame = F(parent=self.container, controller=self)
-            self.frames[page_name] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
+        # Frames are built the first time they are shown
+        self._frame_classes = {
+            "FileSelectFrame": FileSelectFrame,
+            "ResultsFrame": ResultsFrame,
+            "CustomMetadataFrame": CustomMetadataFrame,
+        }
 
         self.show_frame("FileSelectFrame")
 
     def _configure_styles(self):
-        style = ttk.Style()
+        style = ttk.Style(self)
+        # Styles live in the Tcl interpreter: skip the whole setup if it already ran for it
+        if style.theme_use() == "clam" and style.lookup("Header.TLabel", "font"):
+            return
         style.theme_use("clam") # 'clam' usually allows more color customization than 'aqua' on Mac
 
         # Frame Style
@@ -74,9 +82,18 @@ class MetadataAnalyzerApp(tk.Tk):
         # Entry Style
         style.configure("TEntry", fieldbackground="#505050", foreground="white", insertcolor="white")
 
+        # Treeview Style (custom metadata table)
+        style.configure("Treeview", background="#505050", fieldbackground="#505050", foreground="white", font=FONT_SMALL)
+        style.configure("Treeview.Heading", font=FONT_MAIN, background=BUTTON_BG, foreground=BUTTON_FG)
+        style.map("Treeview", background=[("selected", ACCENT_COLOR)], foreground=[("selected", "black")])
+
     def show_frame(self, page_name):
-        """Show a frame for the given page name."""
-        frame = self.frames[page_name]
+        """Show a frame for the given page name, creating it on first use."""
+        frame = self.frames.get(page_name)
+        if frame is None:
+            frame = self._frame_classes[page_name](parent=self.container, controller=self)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[page_name] = frame
         frame.tkraise()
         # Optional: Call an 'on_show' method if the frame has it to refresh data
         if hasattr(frame, "on_show"):
@@ -84,3 +101,17 @@ class MetadataAnalyzerApp(tk.Tk):
 
     def get_selected_file(self):
         return self.selected_file_path.get()
+
+    def _clear_path_caches(self, *args):
+        """Drops cached file info and resolved paths so a renamed file or changed symlink is seen again."""
+        self._path_meta_cache.clear()
+        clear_path_cache()
+
+    def get_file_info(self, path):
+        """Returns (extension, file type) for path, calling load_file_info only once per path."""
+        info = self._path_meta_cache.get(path)
+        if info is None:
+            file_info = load_file_info(path)
+            info = (file_info["extension"], file_info["type"])
+            self._path_meta_cache[path] = info
+        return info
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import os
+import re
 from typing import Dict
 
-from core.analyze_metadata import extract_metadata_auto, format_metadata
+from core.analyze_metadata import extract_metadata_auto, extract_metadata_batch, format_metadata
 from core.detect_extension import (
     extension_matches_mime,
     get_mime_type,
@@ -24,6 +26,7 @@ from core.modify_metadata.wipe_metadata import (
     wipe_metadata_image,
     wipe_metadata_pdf,
 )
+from utils.path_tools import clear_path_cache
 
 # Menú principal de la aplicación
 MAIN_MENU = """
@@ -34,10 +37,14 @@ MAIN_MENU = """
 3. Wipe all metadata
 4. Apply default metadata templates
 5. Set custom metadata fields
-6. Exit
+6. Analyze all files in a folder
+7. Exit
 
 Select an option > """
 
+# Pares "clave=valor" separados por comas; los fragmentos sin "=" se ignoran
+_KV_RE = re.compile(r"\s*([^,=]+?)\s*=\s*([^,]*?)\s*(?:,|$)")
+
 
 def get_file_path() -> str:
     """Pide al usuario la ruta del archivo y limpia la entrada."""
@@ -57,13 +64,34 @@ def analyze_metadata_flow() -> None:
         print(f"Oops, couldn't find that file: {e}")
 
 
+def analyze_folder_flow() -> None:
+    """Analiza en paralelo todos los archivos de una carpeta."""
+    folder = os.path.expanduser(input("Please enter the folder path: ").strip())
+    if not os.path.isdir(folder):
+        print(f"Oops, that's not a folder: {folder}")
+        return
+        
+    with os.scandir(folder) as entries:
+        paths = sorted(entry.path for entry in entries if entry.is_file())
+    if not paths:
+        print("No files found in that folder.")
+        return
+        
+    print(f"Analyzing {len(paths)} files...")
+    print("\n--- Analysis Results ---")
+    for results in extract_metadata_batch(paths):
+        print(format_metadata(results))
+    print("------------------------\n")
+
+
 def verify_extension_flow() -> None:
     """Comprueba si la extensión del archivo coincide con su contenido real."""
     path = get_file_path()
     try:
+        # El tipo MIME se detecta una sola vez y se reutiliza en las dos comprobaciones
         mime_type = get_mime_type(path)
-        is_match = extension_matches_mime(path)
-        suggestion = suggest_correct_extension(path)
+        is_match = extension_matches_mime(path, mime_type=mime_type)
+        suggestion = suggest_correct_extension(path, mime_type=mime_type)
 
         print(f"\nDetected MIME type: {mime_type}")
         print(f"Extension matches content? {'Yes' if is_match else 'No'}")
@@ -130,17 +158,8 @@ def get_custom_metadata_input() -> Dict[str, str]:
     print("Example: author=Jane Doe, title=Final Report")
     raw_input = input("> ").strip()
     
-    parsed_data: Dict[str, str] = {}
-    if not raw_input:
-        return parsed_data
-
-    # Divide por comas y luego por el signo igual
-    for item in raw_input.split(','):
-        if '=' in item:
-            key, value = item.split('=', 1)
-            parsed_data[key.strip()] = value.strip()
-            
-    return parsed_data
+    # Una sola pasada extrae todos los pares clave=valor ya sin espacios
+    return dict(_KV_RE.findall(raw_input))
 
 
 def apply_custom_metadata_flow() -> None:
@@ -173,24 +192,29 @@ def apply_custom_metadata_flow() -> None:
         print(f"Error: {e}")
 
 
+# Acción asociada a cada opción del menú principal ("7" sale del bucle)
+_MENU_OPTIONS = {
+    "1": analyze_metadata_flow,
+    "2": verify_extension_flow,
+    "3": wipe_metadata_flow,
+    "4": apply_default_metadata_flow,
+    "5": apply_custom_metadata_flow,
+    "6": analyze_folder_flow,
+}
+
+
 def run_cli() -> None:
     """Bucle principal de la aplicación en modo consola."""
-    menu_options = {
-        "1": analyze_metadata_flow,
-        "2": verify_extension_flow,
-        "3": wipe_metadata_flow,
-        "4": apply_default_metadata_flow,
-        "5": apply_custom_metadata_flow,
-    }
-    
     while True:
+        # Las rutas pueden cambiar entre operaciones (renombrados, enlaces simbólicos)
+        clear_path_cache()
         user_choice = input(MAIN_MENU).strip()
         
-        if user_choice == "6":
+        if user_choice == "7":
             print("See you later!")
             break
             
-        action = menu_options.get(user_choice)
+        action = _MENU_OPTIONS.get(user_choice)
         if action:
             action()
         else:
@@ -4,11 +4,19 @@ Contiene la lógica para detectar patrones sospechosos en metadatos y estructura
 """
 from __future__ import annotations
 
+import mmap
+import os
 import re
 import zipfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+try:
+    # google-re2 (opcional): motor de tiempo lineal, inmune al backtracking catastrófico
+    import re2
+except ImportError:
+    re2 = None
+
 # --- Constantes y Patrones ---
 
 # Patrones de cadenas sospechosas en metadatos (texto)
@@ -24,6 +32,34 @@ SUSPICIOUS_METADATA_PATTERNS = [
     (r"Document_Open", "Macro de auto-ejecución (Office)"),
 ]
 
+# Patrones precompilados en el orden de SUSPICIOUS_METADATA_PATTERNS
+_METADATA_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern, _ in SUSPICIOUS_METADATA_PATTERNS)
+_METADATA_PATTERN_DESCS = [desc for _, desc in SUSPICIOUS_METADATA_PATTERNS]
+
+
+def _build_re2_set() -> Optional[Any]:
+    """
+    Compila los patrones en un ``re2.Set``, que indica en una sola pasada lineal qué patrones
+    aparecen en el texto.
+    """
+    if re2 is None:
+        return None
+    try:
+        options = re2.Options()
+        options.case_sensitive = False
+        pattern_set = re2.Set.SearchSet(options)
+        for pattern, _ in SUSPICIOUS_METADATA_PATTERNS:
+            pattern_set.Add(pattern)
+        pattern_set.Compile()
+        return pattern_set
+    except Exception:
+        return None
+
+
+_METADATA_RE2_SET = _build_re2_set()
+# Longitud de la coincidencia más corta posible ("eval(")
+_MIN_PATTERN_LENGTH = 5
+
 # Palabras clave sospechosas en estructura PDF (bytes)
 PDF_THREAT_KEYWORDS = {
     b"/JavaScript": "Contiene código JavaScript",
@@ -34,46 +70,91 @@ PDF_THREAT_KEYWORDS = {
     b"/RichMedia": "Contenido multimedia enriquecido (posible vector de ataque)",
 }
 
+# Todas las palabras clave en una sola expresión para recorrer el contenido una única vez.
+# Ninguna contiene "/" salvo al inicio, así que las coincidencias nunca se solapan
+_PDF_THREAT_RE = re.compile(b"|".join(re.escape(keyword) for keyword in PDF_THREAT_KEYWORDS))
+
+# En PDFs de más de 2 MiB solo se recorren el primer y el último MiB: el final guarda el trailer,
+# la xref, /Info y las actualizaciones incrementales, y el inicio el catálogo de los PDFs
+# linealizados. El cuerpo (flujos de contenido, fuentes, imágenes) solo se recorre si los extremos
+# hacen referencia a acciones guardadas en él (/OpenAction, /Names) sin que aparezca el script
+_PDF_WINDOW_SIZE = 1024 * 1024
+_PDF_WINDOWED_MIN_SIZE = 2 * _PDF_WINDOW_SIZE
+_PDF_NAMES_RE = re.compile(rb"/Names")
+
+# Pares (palabra clave, descripción) precalculados en el orden de PDF_THREAT_KEYWORDS
+_PDF_KW = tuple(PDF_THREAT_KEYWORDS.items())
+
+# Palabras clave que convierten /OpenAction en sospechoso
+_PDF_SCRIPT_KEYWORDS = frozenset({b"/JavaScript", b"/JS", b"/Launch"})
+
+# Tamaño del registro de fin de directorio central, el mínimo de cualquier ZIP
+_ZIP_MIN_SIZE = 22
+
+# Carpetas donde Word, Excel y PowerPoint guardan los objetos OLE incrustados
+_OFFICE_OLE_PREFIXES = (
+    "word/embeddings/oleObject",
+    "xl/embeddings/oleObject",
+    "ppt/embeddings/oleObject",
+)
+
 
 # --- Funciones de Análisis ---
 
+def _matching_pattern_indexes(value: str) -> List[int]:
+    """Devuelve, en orden, los índices de SUSPICIOUS_METADATA_PATTERNS que aparecen en *value*."""
+    if _METADATA_RE2_SET is not None:
+        try:
+            return sorted(_METADATA_RE2_SET.Match(value) or ())
+        except UnicodeEncodeError:
+            pass # Sustitutos sueltos que RE2 no puede codificar en UTF-8: se usa re
+    return [index for index, regex in enumerate(_METADATA_PATTERNS) if regex.search(value)]
+
+
 def check_metadata_risk(metadata: Dict[str, Any]) -> List[str]:
     """
-    Escanea recursivamente los valores de los metadatos en busca de patrones sospechosos.
+    Escanea los valores de los metadatos (recorriendo diccionarios y listas anidados)
+    en busca de patrones sospechosos.
     """
     indicators = []
-
-    def recursive_scan(value: Any, path: str = ""):
+    # Pila explícita de (valor, ruta); los hijos se apilan al revés para conservar el orden
+    stack = [(metadata, "")]
+    
+    while stack:
+        value, path = stack.pop()
         if isinstance(value, dict):
-            for k, v in value.items():
-                recursive_scan(v, f"{path}.{k}" if path else k)
+            stack.extend(
+                (v, f"{path}.{k}" if path else k) for k, v in reversed(value.items())
+            )
         elif isinstance(value, list):
-            for i, v in enumerate(value):
-                recursive_scan(v, f"{path}[{i}]")
+            stack.extend((value[i], f"{path}[{i}]") for i in range(len(value) - 1, -1, -1))
         elif isinstance(value, str):
+            # Ningún patrón puede coincidir con cadenas más cortas que "eval("
+            if len(value) < _MIN_PATTERN_LENGTH:
+                continue
+                
             # Comprobación de longitud excesiva (posible buffer overflow o payload oculto)
             # 5000 es un límite arbitrario pero razonable para metadatos normales
             if len(value) > 5000:
                 indicators.append(f"Valor inusualmente largo en '{path}' ({len(value)} caracteres)")
 
-            # Comprobación de patrones regex
-            for pattern, desc in SUSPICIOUS_METADATA_PATTERNS:
-                if re.search(pattern, value, re.IGNORECASE):
-                    indicators.append(f"Detectado '{desc}' en '{path}'")
+            # Comprobación de patrones regex (se informa una vez por patrón y en su orden)
+            for index in _matching_pattern_indexes(value):
+                indicators.append(f"Detectado '{_METADATA_PATTERN_DESCS[index]}' en '{path}'")
 
-    recursive_scan(metadata)
     return indicators
 
 
-def check_file_risk(file_path: Path, mime_type: str) -> List[str]:
+def check_file_risk(file_path: Path, mime_type: str, content: Optional[bytes | mmap.mmap] = None) -> List[str]:
     """
     Analiza la estructura del archivo en busca de amenazas específicas del formato.
+    *content* es el contenido del archivo si el llamador ya lo tiene en memoria o mapeado.
     """
     indicators = []
     
     try:
         if mime_type == "application/pdf":
-            indicators.extend(scan_pdf_structure(file_path))
+            indicators.extend(scan_pdf_structure(file_path, content=content))
             
         elif mime_type in (
             "application/vnd.openxmlformats-officedocument.wordprocessingml.document", # docx
@@ -88,60 +169,107 @@ def check_file_risk(file_path: Path, mime_type: str) -> List[str]:
     return indicators
 
 
-def scan_pdf_structure(file_path: Path) -> List[str]:
-    """Escaneo básico de estructura PDF."""
+def _find_pdf_keywords(content: bytes | mmap.mmap, start: int = 0, end: Optional[int] = None) -> set:
+    """
+    Devuelve las palabras clave de PDF_THREAT_KEYWORDS presentes en *content* (una sola pasada).
+    *start* y *end* limitan la búsqueda a una ventana sin copiar el contenido.
+    """
+    found = set()
+    for match in _PDF_THREAT_RE.finditer(content, start, len(content) if end is None else end):
+        found.add(match.group())
+        # Ya no queda nada por encontrar
+        if len(found) == len(PDF_THREAT_KEYWORDS):
+            break
+    return found
+
+
+def _find_pdf_keywords_windowed(content: bytes | mmap.mmap) -> set:
+    """Busca las palabras clave en los extremos del PDF y solo recorre el cuerpo si hace falta."""
+    size = len(content)
+    if size <= _PDF_WINDOWED_MIN_SIZE:
+        return _find_pdf_keywords(content)
+        
+    tail_start = size - _PDF_WINDOW_SIZE
+    found = _find_pdf_keywords(content, 0, _PDF_WINDOW_SIZE) | _find_pdf_keywords(content, tail_start)
+    
+    # Una acción referenciada desde los extremos puede tener su script en el cuerpo
+    if found.isdisjoint(_PDF_SCRIPT_KEYWORDS) and (
+        b"/OpenAction" in found
+        or _PDF_NAMES_RE.search(content, 0, _PDF_WINDOW_SIZE)
+        or _PDF_NAMES_RE.search(content, tail_start)
+    ):
+        return _find_pdf_keywords(content)
+    return found
+
+
+def _scan_pdf_content(content: bytes | mmap.mmap) -> List[str]:
+    """Busca las palabras clave de amenaza en el contenido de un PDF."""
+    indicators = []
+    found = _find_pdf_keywords_windowed(content)
+    
+    # Se evalúa una sola vez si hay scripts o lanzadores (condición para /OpenAction)
+    has_script = not found.isdisjoint(_PDF_SCRIPT_KEYWORDS)
+
+    for keyword, desc in _PDF_KW:
+        if keyword in found:
+            # Refinamiento: /OpenAction es muy común en PDFs legítimos para ajustar el zoom inicial.
+            # Solo lo marcamos si NO parece ser una configuración de vista estándar.
+            if keyword == b"/OpenAction":
+                # Como es un escaneo de bytes crudos, es difícil saber el contexto exacto sin parsear.
+                # Estrategia: Si encontramos /OpenAction Y (/JavaScript o /Launch), entonces es sospechoso.
+                # Si está solo, podría ser benigno.
+                
+                # Para reducir ruido, solo reportamos OpenAction si también detectamos JS o Launch
+                if has_script:
+                     indicators.append(f"Estructura PDF sospechosa: {desc} combinada con scripts/lanzadores")
+            else:
+                indicators.append(f"Estructura PDF sospechosa: {desc} ({keyword.decode()})")
+    return indicators
+
+
+def scan_pdf_structure(file_path: Path, content: Optional[bytes | mmap.mmap] = None) -> List[str]:
+    """Escaneo básico de estructura PDF. Si se pasa *content* no se vuelve a abrir el archivo."""
     indicators = []
     try:
-        with open(file_path, "rb") as f:
-            content = f.read()
-            
-        # Comprobación de falsos positivos comunes (ej. jsPDF)
-        # jsPDF a menudo incluye referencias a /OpenAction o /JavaScript por defecto
-        if b"jsPDF" in content:
-             # Si es jsPDF, somos más permisivos, solo alertamos si hay código JS explícito
-             # que parezca malicioso, no solo la presencia de la etiqueta.
-             pass
-
-        for keyword, desc in PDF_THREAT_KEYWORDS.items():
-            if keyword in content:
-                # Refinamiento: /OpenAction es muy común en PDFs legítimos para ajustar el zoom inicial.
-                # Solo lo marcamos si NO parece ser una configuración de vista estándar.
-                if keyword == b"/OpenAction":
-                    # Buscamos si es una acción de JavaScript o Launch
-                    # Si solo es un diccionario de vista (ej. /Fit), lo ignoramos (simplificado)
-                    # Como es un escaneo de bytes crudos, es difícil saber el contexto exacto sin parsear.
-                    # Estrategia: Si encontramos /OpenAction Y (/JavaScript o /Launch), entonces es sospechoso.
-                    # Si está solo, podría ser benigno.
-                    
-                    # Para reducir ruido, solo reportamos OpenAction si también detectamos JS o Launch
-                    if b"/JavaScript" in content or b"/JS" in content or b"/Launch" in content:
-                         indicators.append(f"Estructura PDF sospechosa: {desc} combinada con scripts/lanzadores")
-                else:
-                    indicators.append(f"Estructura PDF sospechosa: {desc} ({keyword.decode()})")
+        if content is not None:
+            indicators = _scan_pdf_content(content)
+        else:
+            # El mmap deja que el sistema pagine el archivo bajo demanda en lugar de copiarlo entero
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                indicators = _scan_pdf_content(mapped)
                     
     except Exception:
         pass # Errores de lectura se manejan arriba
-    return list(set(indicators)) # Eliminar duplicados
+    return list(dict.fromkeys(indicators)) # Eliminar duplicados conservando el orden
 
 
 def scan_office_structure(file_path: Path) -> List[str]:
     """Escaneo de estructura Office (ZIP)."""
     indicators = []
     try:
-        if not zipfile.is_zipfile(file_path):
+        # Un ZIP tiene al menos el registro de fin de directorio central (22 bytes)
+        if os.stat(file_path).st_size < _ZIP_MIN_SIZE:
+            return []
+            
+        # ZipFile solo lee el directorio central; si no es un ZIP lo indica él mismo,
+        # sin la apertura adicional de is_zipfile()
+        try:
+            zf = zipfile.ZipFile(file_path, 'r')
+        except zipfile.BadZipFile:
             return []
 
-        with zipfile.ZipFile(file_path, 'r') as zf:
+        with zf:
             file_names = zf.namelist()
             
             # Detección de Macros VBA
-            if any(name.endswith("vbaProject.bin") for name in file_names):
+            basenames = {name.rpartition("/")[2] for name in file_names}
+            if "vbaProject.bin" in basenames:
                 indicators.append("Contiene Macros VBA (vbaProject.bin)")
             
             # Detección de objetos OLE
-            ole_files = [f for f in file_names if "embeddings/oleObject" in f]
-            if ole_files:
-                indicators.append(f"Contiene {len(ole_files)} objeto(s) OLE incrustado(s)")
+            ole_count = sum(1 for name in file_names if name.startswith(_OFFICE_OLE_PREFIXES))
+            if ole_count:
+                indicators.append(f"Contiene {ole_count} objeto(s) OLE incrustado(s)")
     except Exception:
         pass
     return indicators
@@ -149,9 +277,15 @@ def scan_office_structure(file_path: Path) -> List[str]:
 
 # --- Punto de Entrada Principal ---
 
-def analyze_risk(file_path: Path, metadata: Dict[str, Any], mime_type: str) -> Dict[str, Any]:
+def analyze_risk(
+    file_path: Path,
+    metadata: Dict[str, Any],
+    mime_type: str,
+    content: Optional[bytes | mmap.mmap] = None,
+) -> Dict[str, Any]:
     """
     Realiza un análisis de seguridad completo (metadatos + estructura).
+    Si el llamador ya leyó o mapeó el archivo puede pasarlo en *content* para no leerlo otra vez.
     Devuelve un diccionario con los hallazgos.
     """
     findings = []
@@ -160,7 +294,7 @@ def analyze_risk(file_path: Path, metadata: Dict[str, Any], mime_type: str) -> D
     findings.extend(check_metadata_risk(metadata))
     
     # 2. Analizar estructura del archivo
-    findings.extend(check_file_risk(file_path, mime_type))
+    findings.extend(check_file_risk(file_path, mime_type, content))
     
     return {
         "is_suspicious": len(findings) > 0,
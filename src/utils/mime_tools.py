@@ -11,7 +11,7 @@ EXTENSIONES_MIME: dict[str, str] = {
     ".gif": "image/gif",
     ".webp": "image/webp",
     ".heic": "image/heic",
-    ".heic": "image/heif",
+    ".heif": "image/heif",
     ".txt": "text/plain",
     ".doc": "application/msword",
     ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -25,12 +25,21 @@ EXTENSIONES_MIME: dict[str, str] = {
     ".rtf": "text/rtf",
 }
 
+# Índice inverso MIME -> extensión; ante varias extensiones gana la primera declarada
+# (se recorre al revés para que la primera sobrescriba a las siguientes)
+_MIME_TO_EXT: dict[str, str] = {
+    mime.lower(): ext for ext, mime in reversed(EXTENSIONES_MIME.items())
+}
+
+# Constantes para clasificar tipos MIME sin construir tuplas en cada llamada
+IMAGE_PREFIX = "image/"
+PDF_MIME = "application/pdf"
+DOCX_MIMES = frozenset({
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+})
+
 
 def guess_extension_from_mime(mime: str) -> Optional[str]:
     """Devuelve la primera extensión que coincide con *mime* o ``None``."""
-
-    mime = (mime or "").lower()
-    for ext, expected in EXTENSIONES_MIME.items():
-        if expected == mime:
-            return ext
-    return None
+    return _MIME_TO_EXT.get((mime or "").lower())
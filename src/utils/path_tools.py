@@ -1,7 +1,19 @@
 """Utilidades para trabajar con rutas del sistema de archivos."""
 from __future__ import annotations
 
+import os
+import stat
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
+
+
+@lru_cache(maxsize=256)
+def _resolve_str(path: str) -> Path:
+    """Resuelve una ruta absoluta (cacheado: evita repetir las llamadas de ``realpath``)."""
+
+    return Path(path).resolve()
 
 
 def resolve_path(path: str | Path) -> Path:
@@ -10,24 +22,74 @@ def resolve_path(path: str | Path) -> Path:
     La función no requiere que el archivo exista. Simplemente
     resuelve la ruta proporcionada por el usuario para que los ayudantes de nivel superior
     puedan trabajar con una ubicación canónica.
+
+    Las rutas absolutas se cachean; las relativas dependen del directorio actual
+    y se resuelven siempre. :func:`clear_path_cache` vacía la caché.
     """
 
-    return Path(path).expanduser().resolve()
+    expanded = os.path.expanduser(os.fspath(path))
+    if os.path.isabs(expanded):
+        return _resolve_str(expanded)
+    return Path(expanded).resolve()
+
+
+def clear_path_cache() -> None:
+    """Vacía la caché de :func:`resolve_path` (archivos renombrados o enlaces simbólicos cambiados)."""
+
+    _resolve_str.cache_clear()
 
 
 def file_exists(path: str | Path) -> bool:
     """Devuelve ``True`` si *path* es un archivo regular existente."""
 
+    # Caso habitual (cadena sin "~"): una sola llamada a stat() sin construir ni resolver un Path
+    if isinstance(path, str) and not path.startswith("~"):
+        return os.path.isfile(path)
     return resolve_path(path).is_file()
 
 
-def ensure_readable_file(path: str | Path) -> Path:
+@dataclass
+class FileCtx:
+    """Archivo ya validado junto con su ``stat()`` y, si se conoce, su tipo MIME.
+
+    Se construye una sola vez al inicio del análisis y se pasa a los extractores
+    en lugar de la ruta para no repetir las comprobaciones del sistema de archivos.
+    """
+
+    path: Path
+    stat_result: os.stat_result
+    mime_type: Optional[str] = None
+
+    @classmethod
+    def from_path(cls, path: str | Path, mime_type: Optional[str] = None) -> "FileCtx":
+        """Resuelve y valida *path* con una única llamada a ``stat()``.
+
+        Raises:
+            FileNotFoundError: Si la ruta no existe o no es un archivo.
+        """
+
+        resolved = resolve_path(path)
+        try:
+            file_stat = resolved.stat()
+        except OSError:
+            file_stat = None
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(f"El archivo '{resolved}' no existe o no es válido")
+        return cls(resolved, file_stat, mime_type)
+
+
+def ensure_readable_file(path: str | Path | FileCtx) -> Path:
     """Valida que *path* es un archivo legible y lo devuelve.
 
+    Si recibe un :class:`FileCtx` ya validado devuelve su ruta sin volver a comprobarla.
+
     Raises:
         FileNotFoundError: Si la ruta no existe o no es un archivo.
     """
 
+    if isinstance(path, FileCtx):
+        return path.path
+
     resolved = resolve_path(path)
     if not resolved.is_file():
         raise FileNotFoundError(f"El archivo '{resolved}' no existe o no es válido")